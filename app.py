@@ -2,7 +2,9 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 import duckdb
-from pathlib import Path
+import numpy as np
+
+from dashboard import live, news, perf, warehouse
 
 # =============================
 # CONFIG
@@ -24,6 +26,7 @@ st.markdown(
     """,
     unsafe_allow_html=True
 )
+perf.start_rerun("app")
 
 st.title("Global Energy Dashboard")
 st.caption("Oil, Gas & Energy Visualization – DuckDB-based Prototype")
@@ -31,44 +34,51 @@ st.caption("Oil, Gas & Energy Visualization – DuckDB-based Prototype")
 # =============================
 # LOAD DATA FUNCTIONS
 # =============================
-DB_PATH = Path("data/db/energy.duckdb")
+DB_PATH = warehouse.db_path()
+
+LIVE_BENCHMARKS = ["Brent", "WTI", "Henry Hub"]
+LIVE_REFRESH_SECONDS = 5
 
-@st.cache_data
-def load_price_data(db_path=DB_PATH):
+@perf.cache_data(max_entries=warehouse.CACHE_ENTRIES)
+def load_price_data(db_path):
     if not db_path.exists():
         st.error(f"DuckDB file not found: {db_path}")
         return pd.DataFrame(columns=["period","value","benchmark"])
     conn = duckdb.connect(database=str(db_path), read_only=True)
     try:
-        df = conn.execute("""
+        df = perf.query(conn, """
             SELECT date AS period, price AS value, benchmark
             FROM price
             WHERE benchmark IN ('Brent', 'WTI', 'Henry Hub')
             ORDER BY date
-        """).df()
+        """)
         df["period"] = pd.to_datetime(df["period"])
         return df
     except Exception as e:
         st.warning(f"Failed to load price data: {e}")
         return pd.DataFrame(columns=["period","value","benchmark"])
 
-@st.cache_data
-def load_prod_cons(db_path=DB_PATH):
+@perf.cache_data(max_entries=warehouse.CACHE_ENTRIES)
+def load_prod_cons(db_path):
     if not db_path.exists():
         st.error(f"DuckDB file not found: {db_path}")
         return pd.DataFrame(columns=["Year","Production","Consumtion","Energy"])
     conn = duckdb.connect(database=str(db_path), read_only=True)
     dfs = []
 
-    tables_df = conn.execute("SHOW TABLES").df()
+    tables_df = perf.query(conn, "SHOW TABLES")
     table_col = [c for c in tables_df.columns if c.lower() in ("name","table_name")][0]
     tables = tables_df[table_col].tolist()
 
     # OIL
     try:
-        oil_prod = conn.execute("SELECT Year, SUM(Production) AS Production FROM oil_prod GROUP BY Year").df()
-        oil_cons = conn.execute("SELECT Year, SUM(Consumtion) AS Consumtion FROM oil_cons GROUP BY Year").df()
-        oil = pd.merge(oil_prod, oil_cons, on="Year", how="outer").fillna(0)
+        oil_prod = perf.query(conn, "SELECT Year, SUM(Production) AS Production FROM oil_prod GROUP BY Year")
+        oil_cons = perf.query(conn, "SELECT Year, SUM(Consumtion) AS Consumtion FROM oil_cons GROUP BY Year")
+        with perf.span("merge oil prod/cons"):
+            oil = pd.merge(oil_prod, oil_cons, on="Year", how="outer")
+            # Zero-fill gap years only; a series with no rows at all (oil_cons
+            # quarantined) stays NaN so it is hidden instead of drawn at 0
+            oil = oil.fillna({c: 0 for c in ("Production", "Consumtion") if oil[c].notna().any()})
         oil["Energy"] = "Oil"
         dfs.append(oil)
     except Exception as e:
@@ -78,33 +88,35 @@ def load_prod_cons(db_path=DB_PATH):
     try:
         # --- Production ---
         if "gas_prod" in tables:
-            gas_prod = conn.execute("""
+            gas_prod = perf.query(conn, """
                 SELECT Year, SUM(Production) AS Production
                 FROM gas_prod
                 GROUP BY Year
-            """).df()
+            """)
         elif "goget" in tables:
-            gas_prod = conn.execute("""
+            gas_prod = perf.query(conn, """
                 SELECT production_year AS Year,
                        SUM(production) AS Production
                 FROM goget
                 WHERE commodity = 'Gas'
                 GROUP BY production_year
-            """).df()
+            """)
         else:
             gas_prod = pd.DataFrame(columns=["Year", "Production"])
     
         # --- Consumption ---
         if "gas_cons" in tables:
-            gas_cons = conn.execute("""
+            gas_cons = perf.query(conn, """
                 SELECT Year, SUM(Consumtion) AS Consumtion
                 FROM gas_cons
                 GROUP BY Year
-            """).df()
+            """)
         else:
             gas_cons = pd.DataFrame(columns=["Year", "Consumtion"])
 
-        gas = pd.merge(gas_prod, gas_cons, on="Year", how="outer").fillna(0)
+        with perf.span("merge gas prod/cons"):
+            gas = pd.merge(gas_prod, gas_cons, on="Year", how="outer")
+            gas = gas.fillna({c: 0 for c in ("Production", "Consumtion") if gas[c].notna().any()})
         gas["Energy"] = "Gas"
         dfs.append(gas)
     except Exception as e:
@@ -116,18 +128,18 @@ def load_prod_cons(db_path=DB_PATH):
     else:
         return pd.DataFrame(columns=["Year","Production","Consumtion","Energy"])
 
-@st.cache_data
-def load_map_data(db_path=DB_PATH):
+@perf.cache_data(max_entries=warehouse.CACHE_ENTRIES)
+def load_map_data(db_path):
     if not db_path.exists():
         st.error(f"DuckDB file not found: {db_path}")
         return pd.DataFrame(columns=["Country","iso3","Production"])
     conn = duckdb.connect(database=str(db_path), read_only=True)
     try:
-        df = conn.execute("""
+        df = perf.query(conn, """
             SELECT country AS Country, iso3, SUM(production) AS Production
             FROM goget
             GROUP BY country, iso3
-        """).df()
+        """)
         return df
     except Exception as e:
         st.warning(f"Failed to load map data: {e}")
@@ -150,12 +162,82 @@ def filter_by_timespan(df, date_col, span):
 
     return df[df[date_col] >= cutoff]
 
+@st.fragment(run_every=LIVE_REFRESH_SECONDS)
+def live_price_panel(price_df):
+    """Price tiles + chart, rerun on its own every few seconds.
+
+    The figure is built once per session and time span; each refresh only
+    appends ticks newer than the last one seen to the existing traces.
+    Timed refreshes are logged as their own "app:live_price" records.
+    """
+    own_record = perf.start_fragment("app:live_price")
+    span_price = st.radio(
+        "Time span",
+        ["1Y", "3Y", "10Y"],
+        horizontal=True,
+        key="price_span"
+    )
+
+    state = st.session_state.get("live_price")
+    if state is None or state["span"] != span_price:
+        live_rows = state["rows"] if state else price_df.iloc[0:0]
+        with perf.span("filter price timespan"):
+            price_filtered = filter_by_timespan(
+                pd.concat([price_df, live_rows], ignore_index=True),
+                "period",
+                span_price
+            )
+
+        with perf.span("build price figure", kind="figure"):
+            fig = px.line(price_filtered, x="period", y="value", color="benchmark",
+                          labels={"value": "USD / Barrel", "period": "Date", "benchmark": "Oil Type"},
+                          height=260)
+            fig.update_traces(opacity=0.45)
+            fig.update_layout(legend_title_text="Click to focus / hide", hovermode="x unified")
+
+        state = {
+            "span": span_price,
+            "fig": fig,
+            "rows": live_rows,
+            "last_seen": price_df["period"].max() if state is None else state["last_seen"],
+            "segment": "" if state is None else state["segment"],
+        }
+        st.session_state["live_price"] = state
+
+    segment = live.latest_segment()
+    if segment > state["segment"] and pd.notna(state["last_seen"]):
+        with perf.span("fetch live ticks", kind="query"):
+            new_rows = live.ticks_since(state["last_seen"], LIVE_BENCHMARKS, after=state["segment"])
+        if not new_rows.empty:
+            with perf.span("extend price figure", kind="figure"):
+                for trace in state["fig"].data:
+                    rows = new_rows[new_rows["benchmark"] == trace.name]
+                    if not rows.empty:
+                        trace.x = np.concatenate([trace.x, rows["period"].to_numpy()])
+                        trace.y = np.concatenate([trace.y, rows["value"].to_numpy()])
+            state["rows"] = pd.concat([state["rows"], new_rows], ignore_index=True)
+            state["last_seen"] = new_rows["period"].max()
+        state["segment"] = segment
+
+    latest = pd.concat([price_df.tail(len(LIVE_BENCHMARKS) * 5), state["rows"]])
+    tiles = st.columns(len(LIVE_BENCHMARKS))
+    for tile, benchmark in zip(tiles, LIVE_BENCHMARKS):
+        series = latest[latest["benchmark"] == benchmark]["value"]
+        if series.empty:
+            continue
+        delta = series.iloc[-1] - series.iloc[-2] if len(series) > 1 else None
+        tile.metric(benchmark, f"{series.iloc[-1]:.2f}", None if delta is None else f"{delta:+.2f}")
+
+    perf.plotly_chart(state["fig"], key="live_price_chart")
+    if own_record:
+        perf.finish_rerun(panel=False)
+
 # =============================
 # LOAD DATA
 # =============================
-price_df = load_price_data()
-prod_cons_df = load_prod_cons()
-migas_map = load_map_data()
+price_df = load_price_data(DB_PATH)
+prod_cons_df = load_prod_cons(DB_PATH)
+migas_map = load_map_data(DB_PATH)
 
 # =============================
 # DUMMY SUBSIDY vs GDP
@@ -173,26 +255,7 @@ col1, col2= st.columns(2)
 
 with col1:
     st.subheader("Global Oil Price Comparison")
-
-    span_price = st.radio(
-        "Time span",
-        ["1Y", "3Y", "10Y"],
-        horizontal=True,
-        key="price_span"
-    )
-
-    price_filtered = filter_by_timespan(
-        price_df,
-        "period",
-        span_price
-    )
-    
-    fig = px.line(price_filtered, x="period", y="value", color="benchmark",
-                  labels={"value": "USD / Barrel", "period": "Date", "benchmark": "Oil Type"},
-                  height=260)
-    fig.update_traces(opacity=0.45)
-    fig.update_layout(legend_title_text="Click to focus / hide", hovermode="x unified")
-    st.plotly_chart(fig)
+    live_price_panel(price_df)
 
     if st.button("View more..."):
         st.switch_page("pages/Harga_Minyak_Detail.py")
@@ -213,16 +276,21 @@ with col2:
     #     key="energy_span"
     # )
 
-    filtered_df = prod_cons_df[prod_cons_df["Energy"] == energy_type]
+    with perf.span("filter energy type"):
+        filtered_df = prod_cons_df[prod_cons_df["Energy"] == energy_type]
+        series = [c for c in ["Production", "Consumtion"] if filtered_df[c].notna().any()]
     
-    fig = px.line(
-        filtered_df,
-        x="Year",
-        y=["Production", "Consumtion"],
-        labels={"value": "Volume", "variable": "Metric"},
-        height=260
-    )
-    st.plotly_chart(fig, use_container_width=True)
+    with perf.span("build prod/cons figure", kind="figure"):
+        fig = px.line(
+            filtered_df,
+            x="Year",
+            y=series or ["Production"],
+            labels={"value": "Volume", "variable": "Metric"},
+            height=260
+        )
+    perf.plotly_chart(fig, use_container_width=True)
+    if series and "Consumtion" not in series:
+        st.caption(f"No {energy_type.lower()} consumption data in consistent units; only production is shown.")
 
 
     if st.button("View more.."):
@@ -252,20 +320,22 @@ selected_country = st.selectbox(
 )
 
 # 👉 Filter data first
-if selected_country != "All":
-    map_df = migas_map[migas_map["Country"] == selected_country]
-else:
-    map_df = migas_map
-
-fig = px.choropleth(
-    map_df,
-    locations="iso3",
-    color="Production",
-    hover_name="Country",
-    projection="robinson",
-    color_continuous_scale="Blues",
-    height=820
-)
+with perf.span("filter map country"):
+    if selected_country != "All":
+        map_df = migas_map[migas_map["Country"] == selected_country]
+    else:
+        map_df = migas_map
+
+with perf.span("build map figure", kind="figure"):
+    fig = px.choropleth(
+        map_df,
+        locations="iso3",
+        color="Production",
+        hover_name="Country",
+        projection="robinson",
+        color_continuous_scale="Blues",
+        height=820
+    )
 
 # 👉 NOW fitbounds works
 if selected_country != "All":
@@ -274,34 +344,20 @@ if selected_country != "All":
         visible=True
     )
 
-st.plotly_chart(fig, use_container_width=True)
+perf.plotly_chart(fig, use_container_width=True)
 
 if st.button("Map Detail..."):
     st.switch_page("pages/Map_Detail.py")
 
+if st.button("Field Asset Map..."):
+    st.switch_page("pages/Asset_Map.py")
+
 
 # =============================
 # NEWS SECTION
 # =============================
-st.subheader("Global Migas News & Analysis")
-news = [
-    {"title": "OPEC+ Considers Production Cut", "source": "Reuters",
-     "summary": "OPEC+ members are discussing potential production cuts amid weakening global demand.",
-     "image": "images/download.jpeg"},
-    {"title": "Middle East Tensions Push Oil Prices Higher", "source": "Bloomberg",
-     "summary": "Escalating geopolitical risks in the Middle East have increased volatility in oil markets.",
-     "image": "images/download (1).jpeg"},
-    {"title": "Global Energy Transition Impacts Oil Demand", "source": "IEA",
-     "summary": "The shift towards renewable energy continues to reshape long-term oil demand outlook.",
-     "image": "images/download (2).jpeg"}
-]
-for article in news:
-    col_img, col_text = st.columns([1,4])
-    with col_img: st.image(article["image"], width=150)
-    with col_text:
-        st.markdown(f"**{article['title']}**")
-        st.caption(article["source"])
-        st.write(article["summary"])
-    st.markdown("---")
+news.render_news()
 
 st.caption("Streamlit Energy Dashboard – DuckDB-based Prototype")
+
+perf.finish_rerun()
@@ -0,0 +1,143 @@
+import hashlib
+import json
+import os
+import shutil
+import uuid
+from pathlib import Path
+
+import duckdb
+import streamlit as st
+
+from dashboard import perf, warehouse
+from data_pipeline import snapshots
+
+# =============================
+# CONFIG
+# =============================
+# Files under static/ are served straight from disk by Streamlit's static
+# file server (server.enableStaticServing), so a download never passes
+# through the Python process or the session's memory.
+EXPORT_DIR = Path("static/exports")
+URL_PREFIX = "app/static/exports"
+
+FORMATS = {
+    "CSV": "csv",
+    "Parquet": "parquet",
+    "Excel": "xlsx",
+}
+
+XLSX_BATCH_ROWS = 50_000
+XLSX_SHEET_ROWS = 1_048_575  # Excel row limit minus the header
+
+# =============================
+# WRITERS
+# =============================
+def _copy(conn, sql, params, path, fmt):
+    options = "FORMAT CSV, HEADER" if fmt == "csv" else "FORMAT PARQUET, COMPRESSION ZSTD"
+    conn.execute(f"COPY ({sql}) TO '{path}' ({options})", params)
+
+
+def _write_xlsx(conn, sql, params, path):
+    """Stream Arrow record batches into a write-only workbook; neither the
+    result set nor the sheet is ever held in memory as a whole."""
+    from openpyxl import Workbook
+
+    reader = conn.execute(sql, params).fetch_record_batch(XLSX_BATCH_ROWS)
+    header = reader.schema.names
+
+    wb = Workbook(write_only=True)
+    ws, rows_in_sheet, sheet_no = wb.create_sheet("data"), 0, 1
+    ws.append(header)
+
+    for batch in reader:
+        for row in zip(*(col.to_pylist() for col in batch.columns)):
+            if rows_in_sheet == XLSX_SHEET_ROWS:
+                sheet_no += 1
+                ws, rows_in_sheet = wb.create_sheet(f"data_{sheet_no}"), 0
+                ws.append(header)
+            ws.append(row)
+            rows_in_sheet += 1
+
+    wb.save(path)
+
+# =============================
+# EXPORT
+# =============================
+def export_path(name, sql, params, fmt, version):
+    digest = hashlib.sha1(
+        json.dumps([sql, params, fmt], default=str).encode()
+    ).hexdigest()[:16]
+    return EXPORT_DIR / version / f"{name}-{digest}.{fmt}"
+
+
+def export(db_path, version, name, sql, params, fmt):
+    """Write the query result to a file once per (selection, format,
+    warehouse version) and return its path; later calls reuse the file."""
+    path = export_path(name, sql, params, fmt, version)
+    if path.exists():
+        return path
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # Unique temp name + atomic rename: concurrent sessions asking for the
+    # same export never see a partial file.
+    tmp = path.with_name(f".{path.stem}.{uuid.uuid4().hex}.{fmt}")
+
+    conn = duckdb.connect(database=str(db_path), read_only=True)
+    try:
+        with perf.span(f"export {fmt}", kind="export"):
+            if fmt == "xlsx":
+                _write_xlsx(conn, sql, params, tmp)
+            else:
+                _copy(conn, sql, params, tmp, fmt)
+        os.replace(tmp, path)
+    finally:
+        conn.close()
+        tmp.unlink(missing_ok=True)
+
+    prune()
+    return path
+
+
+def prune():
+    """Drop export directories of snapshots that no longer exist, and of
+    legacy files that have since been replaced."""
+    if not EXPORT_DIR.exists():
+        return
+    live = set(snapshots.list_versions()) | {snapshots.legacy_version()}
+    for d in EXPORT_DIR.iterdir():
+        if d.is_dir() and d.name not in live:
+            shutil.rmtree(d, ignore_errors=True)
+
+# =============================
+# UI
+# =============================
+def render_export(name, sql, params, key):
+    """Format picker + button that prepares the file and shows a link."""
+    c1, c2 = st.columns([1, 3])
+
+    with c1:
+        fmt_label = st.selectbox("Format", list(FORMATS), key=f"{key}_fmt")
+    fmt = FORMATS[fmt_label]
+
+    with c2:
+        st.write("")
+        prepare = st.button("Prepare export", key=f"{key}_btn")
+
+    if not prepare:
+        return
+
+    try:
+        path = export(
+            warehouse.db_path(), warehouse.version_label(), name, sql, list(params), fmt
+        )
+    except Exception as e:
+        st.warning(f"Export failed: {e}")
+        return
+
+    size_mb = path.stat().st_size / 2**20
+    url = f"{URL_PREFIX}/{path.parent.name}/{path.name}"
+    st.markdown(
+        f'<a href="{url}" download="{path.name}">⬇ Download {path.name}</a> '
+        f"({size_mb:.1f} MB)",
+        unsafe_allow_html=True
+    )
@@ -0,0 +1,58 @@
+import os
+
+import duckdb
+import pandas as pd
+
+from data_pipeline.live_ingest import LATEST_PATH, SEGMENT_DIR
+
+
+def segment_names():
+    """Segment file names, oldest first (names sort by write time)."""
+    try:
+        names = os.listdir(SEGMENT_DIR)
+    except FileNotFoundError:
+        return []
+    return sorted(n for n in names if n.endswith(".parquet") and not n.startswith("."))
+
+
+def latest_segment():
+    """Name of the newest segment, or "". Reads the LATEST pointer the
+    ingester rewrites after each segment, so a refresh with nothing new is
+    one small file read, however many segments the day has produced."""
+    try:
+        return LATEST_PATH.read_text().strip()
+    except FileNotFoundError:
+        names = segment_names()
+        return names[-1] if names else ""
+
+
+def ticks_since(since, benchmarks, after=""):
+    """Live ticks strictly newer than `since` for the given benchmarks, in
+    the landing page's (period, value, benchmark) shape. Only segments whose
+    names sort after `after` are read."""
+    empty = pd.DataFrame(columns=["period", "value", "benchmark"])
+
+    # Compaction may delete a listed segment mid-read; its merged
+    # replacement sorts after it, so one fresh listing is enough
+    for attempt in range(2):
+        files = [str(SEGMENT_DIR / n) for n in segment_names() if n > after]
+        if not files:
+            return empty
+
+        conn = duckdb.connect()
+        try:
+            df = conn.execute(f"""
+                SELECT date AS period, price AS value, benchmark
+                FROM read_parquet(?)
+                WHERE date > ?
+                  AND benchmark IN ({", ".join("?" for _ in benchmarks)})
+                ORDER BY date
+            """, [files, pd.Timestamp(since).to_pydatetime(), *benchmarks]).df()
+            break
+        except duckdb.IOException:
+            if attempt:
+                raise
+        finally:
+            conn.close()
+    df["period"] = pd.to_datetime(df["period"])
+    return df
@@ -0,0 +1,68 @@
+import json
+import logging
+
+import streamlit as st
+
+from dashboard import perf
+from data_pipeline import news_ingest
+
+logger = logging.getLogger("dashboard.news")
+
+
+@st.cache_resource
+def _bootstrap_store():
+    """First run on a fresh checkout: build the store once per process from
+    the local feeds only, so the first render never waits on the network.
+    Remote feeds are fetched by `python -m data_pipeline.news_ingest`.
+    Returns an error message, or None."""
+    try:
+        news_ingest.ingest(local_only=True)
+    except Exception as e:
+        logger.exception("News bootstrap failed")
+        return str(e)
+    return None
+
+
+def store_mtime():
+    try:
+        return news_ingest.STORE_PATH.stat().st_mtime
+    except FileNotFoundError:
+        return 0
+
+
+@perf.cache_data(max_entries=2)
+def load_articles(mtime, limit):
+    """Newest articles from the store; `mtime` keys the cache so a re-ingest
+    is picked up on the next rerun."""
+    if not mtime:
+        return []
+    return json.loads(news_ingest.STORE_PATH.read_text())[:limit]
+
+
+def render_news(limit=3):
+    """The shared "Global Migas News & Analysis" section. Thumbnails are
+    static URLs, so the browser fetches them from the static file server and
+    nothing is read or decoded here."""
+    error = _bootstrap_store() if not news_ingest.STORE_PATH.exists() else None
+
+    st.subheader("Global Migas News & Analysis")
+    if error:
+        st.warning(f"Could not build the news store: {error}")
+    articles = load_articles(store_mtime(), limit)
+    if not articles:
+        st.info("No news yet. Run `python -m data_pipeline.news_ingest` to fetch the feeds.")
+        return
+
+    for article in articles:
+        col_img, col_text = st.columns([1, 4])
+        with col_img:
+            if article.get("thumbnail"):
+                st.image(article["thumbnail"], width=150)
+        with col_text:
+            if article.get("link"):
+                st.markdown(f"**[{article['title']}]({article['link']})**")
+            else:
+                st.markdown(f"**{article['title']}**")
+            st.caption(article["source"])
+            st.write(article["summary"])
+        st.markdown("---")
@@ -0,0 +1,268 @@
+import functools
+import json
+import logging
+import os
+import threading
+import time
+
+import pandas as pd
+import streamlit as st
+
+# =============================
+# CONFIG
+# =============================
+# Instrumentation is off unless the sidebar toggle is ticked or the
+# environment forces it (e.g. DASHBOARD_PERF=1 for a profiling session).
+ENV_FLAG = "DASHBOARD_PERF"
+TOGGLE_KEY = "perf_debug"
+
+logger = logging.getLogger("dashboard.perf")
+if not logger.handlers:
+    _handler = logging.StreamHandler()
+    _handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(_handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+# One record per script thread: Streamlit runs each session's rerun on its
+# own thread, so concurrent sessions never share a record.
+_local = threading.local()
+
+
+class _NullSpan:
+    """Shared no-op span returned when instrumentation is disabled."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **attrs):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def _record():
+    return getattr(_local, "record", None)
+
+
+def enabled():
+    return _record() is not None
+
+# =============================
+# RERUN LIFECYCLE
+# =============================
+def start_rerun(page):
+    """Call once per rerun right after `st.set_page_config`.
+
+    Renders the opt-in sidebar toggle and, when enabled, opens a fresh
+    record for this rerun.
+    """
+    on = st.sidebar.toggle("Performance debug", key=TOGGLE_KEY)
+    if not (on or os.environ.get(ENV_FLAG) == "1"):
+        _local.record = None
+        return
+
+    counters = st.session_state.setdefault("_perf_cache_counters", {})
+    _local.record = {
+        "page": page,
+        "started": time.time(),
+        "t0": time.perf_counter(),
+        "spans": [],
+        "depth": 0,
+        "cache": counters,
+    }
+
+
+def start_fragment(name):
+    """Open a record for a fragment's own rerun (`st.fragment` reruns only
+    the fragment, so the page's start_rerun does not run). Returns True when
+    it opened one; the caller then closes it with finish_rerun(panel=False).
+
+    During a full rerun the page's record is already open and the
+    fragment's spans nest in it. Fragments cannot write to the sidebar, so
+    the toggle is read from session state instead of rendered.
+    """
+    if _record() is not None:
+        return False
+    if not (st.session_state.get(TOGGLE_KEY) or os.environ.get(ENV_FLAG) == "1"):
+        return False
+
+    _local.record = {
+        "page": name,
+        "started": time.time(),
+        "t0": time.perf_counter(),
+        "spans": [],
+        "depth": 0,
+        "cache": st.session_state.setdefault("_perf_cache_counters", {}),
+    }
+    return True
+
+
+def finish_rerun(panel=True):
+    """Close the rerun record, emit it as one JSON log line and, if the
+    toggle is on and `panel` is set, render the sidebar panel."""
+    record = _record()
+    if record is None:
+        return
+    _local.record = None
+
+    total_ms = (time.perf_counter() - record["t0"]) * 1000
+    payload = {
+        "event": "rerun",
+        "page": record["page"],
+        "started": record["started"],
+        "total_ms": round(total_ms, 2),
+        "spans": sorted(record["spans"], key=lambda e: e["at_ms"]),
+        "cache": record["cache"],
+    }
+    logger.info(json.dumps(payload, default=str))
+
+    if panel and st.session_state.get(TOGGLE_KEY):
+        render_panel(payload)
+
+def stop():
+    """`st.stop()` for instrumented pages: closes the rerun record first, so
+    a rerun that ends early still logs its line and renders the panel."""
+    finish_rerun()
+    st.stop()
+
+# =============================
+# SPANS
+# =============================
+class _Span:
+    def __init__(self, record, name, kind, attrs):
+        self.record = record
+        self.entry = {"name": name, "kind": kind, "depth": record["depth"], **attrs}
+
+    def __enter__(self):
+        self.record["depth"] += 1
+        self.t0 = time.perf_counter()
+        self.entry["at_ms"] = round((self.t0 - self.record["t0"]) * 1000, 2)
+        return self
+
+    def __exit__(self, *exc):
+        self.entry["ms"] = round((time.perf_counter() - self.t0) * 1000, 2)
+        self.record["depth"] -= 1
+        self.record["spans"].append(self.entry)
+        return False
+
+    def set(self, **attrs):
+        self.entry.update(attrs)
+
+
+def span(name, kind="transform", **attrs):
+    """Time a block: `with perf.span("filter prices"): ...`.
+
+    Returns a shared no-op object when instrumentation is disabled, so the
+    cost on the hot path is one attribute lookup.
+    """
+    record = _record()
+    if record is None:
+        return _NULL_SPAN
+    return _Span(record, name, kind, attrs)
+
+
+def result_size(result):
+    """Rows and shallow bytes of a DataFrame (or tuple of DataFrames)."""
+    frames = result if isinstance(result, tuple) else (result,)
+    frames = [f for f in frames if isinstance(f, pd.DataFrame)]
+    if not frames:
+        return {}
+    return {
+        "rows": int(sum(len(f) for f in frames)),
+        "bytes": int(sum(f.memory_usage(index=False).sum() for f in frames)),
+    }
+
+
+def query(conn, sql, params=None, name=None):
+    """`conn.execute(sql, params).df()` inside a query span."""
+    with span(name or " ".join(sql.split())[:60], kind="query") as s:
+        df = conn.execute(sql, params).df() if params else conn.execute(sql).df()
+        if s is not _NULL_SPAN:
+            s.set(**result_size(df))
+    return df
+
+# =============================
+# CACHED LOADERS
+# =============================
+def cache_data(func=None, **cache_kwargs):
+    """Drop-in for `st.cache_data` that records a loader span, cache
+    hit/miss and result size when instrumentation is enabled."""
+    if func is None:
+        return lambda f: cache_data(f, **cache_kwargs)
+
+    @functools.wraps(func)
+    def _body(*args, **kwargs):
+        # Only runs on a cache miss
+        _local.miss = True
+        return func(*args, **kwargs)
+
+    cached = st.cache_data(_body, **cache_kwargs)
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        record = _record()
+        if record is None:
+            return cached(*args, **kwargs)
+
+        _local.miss = False
+        with _Span(record, func.__name__, "loader", {}) as s:
+            result = cached(*args, **kwargs)
+        outcome = "miss" if _local.miss else "hit"
+        s.set(cache=outcome, **result_size(result))
+
+        counters = record["cache"].setdefault(func.__name__, {"hit": 0, "miss": 0})
+        counters[outcome] += 1
+        return result
+
+    wrapper.clear = cached.clear
+    return wrapper
+
+# =============================
+# CHARTS
+# =============================
+def _trace_points(trace):
+    for attr in ("x", "lat", "locations", "values"):
+        values = getattr(trace, attr, None)
+        if values is not None:
+            return len(values)
+    return 0
+
+
+def plotly_chart(fig, **kwargs):
+    """`st.plotly_chart` inside a chart span recording trace/point counts."""
+    record = _record()
+    if record is None:
+        return st.plotly_chart(fig, **kwargs)
+
+    points = sum(_trace_points(t) for t in fig.data)
+    with _Span(record, "plotly_chart", "chart", {"traces": len(fig.data), "points": points}):
+        return st.plotly_chart(fig, **kwargs)
+
+# =============================
+# PANEL
+# =============================
+def render_panel(payload):
+    with st.sidebar.expander("Rerun timings", expanded=True):
+        st.metric("Rerun total", f"{payload['total_ms']:.0f} ms")
+
+        spans = pd.DataFrame(payload["spans"])
+        if not spans.empty:
+            spans["name"] = ["· " * d + n for d, n in zip(spans["depth"], spans["name"])]
+            cols = [c for c in ["name", "kind", "ms", "cache", "rows", "bytes", "points"] if c in spans]
+            st.dataframe(
+                spans[cols],
+                hide_index=True,
+                use_container_width=True
+            )
+
+        if payload["cache"]:
+            st.caption("Cache hits / misses this session")
+            st.dataframe(
+                pd.DataFrame(payload["cache"]).T,
+                use_container_width=True
+            )
@@ -0,0 +1,43 @@
+import streamlit as st
+
+from data_pipeline import snapshots
+
+SESSION_KEY = "warehouse_version"
+
+# Cache bounds for loaders keyed by db_path. Every published snapshot adds
+# new keys, and st.cache_data never drops old ones on its own: a whole-table
+# loader keeps the current snapshot and the one older sessions are pinned
+# to; loaders that also take filters keep a window of recent selections.
+CACHE_ENTRIES = 2
+FILTERED_CACHE_ENTRIES = 64
+
+
+def db_path():
+    """Database path pinned to this session.
+
+    The first rerun of a session pins whatever snapshot is current; later
+    reruns keep reading it even after a rebuild publishes a newer one, so a
+    session never mixes data from two builds. The pin moves forward only
+    when the pinned snapshot has been garbage-collected.
+
+    Cached loaders take the path as a required argument and every call
+    passes it: `st.cache_data` keys only on the arguments actually passed,
+    not on defaults, so a `db_path=DB_PATH` default would share one entry
+    across all snapshots. Passed explicitly, entries are keyed per snapshot
+    (and bounded by CACHE_ENTRIES).
+    """
+    version = st.session_state.get(SESSION_KEY)
+    if version is not None and snapshots.snapshot_path(version).exists():
+        return snapshots.snapshot_path(version)
+
+    version = snapshots.current_version()
+    if version is not None and snapshots.snapshot_path(version).exists():
+        st.session_state[SESSION_KEY] = version
+        return snapshots.snapshot_path(version)
+
+    st.session_state.pop(SESSION_KEY, None)
+    return snapshots.LEGACY_DB
+
+
+def version_label():
+    return st.session_state.get(SESSION_KEY) or snapshots.legacy_version()
@@ -0,0 +1,101 @@
+from data_pipeline import snapshots
+
+# Zoom 0 uses 45° cells; every level halves the cell size (zoom 6 ≈ 0.7°).
+ZOOM_LEVELS = 7
+BASE_CELL_DEG = 45.0
+
+LAT_COLUMNS = ("latitude", "lat")
+LON_COLUMNS = ("longitude", "lon", "lng")
+ID_COLUMNS = ("unit_id", "site_id", "field_id")
+NAME_COLUMNS = ("unit_name", "field_name", "site_name", "name")
+
+
+def _pick(columns, candidates):
+    for c in candidates:
+        if c in columns:
+            return c
+    return None
+
+
+def build_asset_clusters(conn):
+    """Build `goget_sites` (one row per site and commodity, latest year) and
+    `goget_clusters` (sites aggregated into grid cells per zoom level).
+
+    The integer (zoom, cell_x, cell_y) key acts as the spatial index: both
+    tables are written sorted on it, so DuckDB zone maps prune bounding-box
+    queries to a handful of row groups.
+    """
+    columns = set(conn.execute("""
+        SELECT lower(column_name) AS column_name
+        FROM information_schema.columns
+        WHERE table_name = 'goget'
+    """).df()["column_name"])
+
+    lat, lon = _pick(columns, LAT_COLUMNS), _pick(columns, LON_COLUMNS)
+    if lat is None or lon is None:
+        print("goget has no coordinate columns, asset clusters not built")
+        return
+
+    name = _pick(columns, NAME_COLUMNS)
+    site_id = _pick(columns, ID_COLUMNS)
+    # Without an explicit id a site is identified by its rounded coordinates
+    site_key = site_id or f"printf('%.4f,%.4f', {lat}, {lon})"
+    site_name = name or site_key
+
+    finest_cell = BASE_CELL_DEG / 2 ** (ZOOM_LEVELS - 1)
+
+    conn.execute(f"""
+        CREATE OR REPLACE TABLE goget_sites AS
+        SELECT
+            CAST({site_key} AS VARCHAR) AS site_id,
+            CAST({site_name} AS VARCHAR) AS site_name,
+            country,
+            iso3,
+            commodity,
+            CAST({lat} AS DOUBLE) AS latitude,
+            CAST({lon} AS DOUBLE) AS longitude,
+            production_year,
+            production
+        FROM goget
+        WHERE {lat} BETWEEN -90 AND 90
+          AND {lon} BETWEEN -180 AND 180
+        QUALIFY ROW_NUMBER() OVER (
+            PARTITION BY {site_key}, commodity
+            ORDER BY production_year DESC NULLS LAST
+        ) = 1
+        ORDER BY
+            FLOOR((latitude + 90) / {finest_cell}),
+            FLOOR((longitude + 180) / {finest_cell})
+    """)
+
+    conn.execute(f"""
+        CREATE OR REPLACE TABLE goget_clusters AS
+        WITH zooms AS (
+            SELECT zoom, {BASE_CELL_DEG} / POW(2, zoom) AS cell
+            FROM range({ZOOM_LEVELS}) t(zoom)
+        )
+        SELECT
+            CAST(zoom AS INTEGER) AS zoom,
+            commodity,
+            CAST(FLOOR((longitude + 180) / cell) AS INTEGER) AS cell_x,
+            CAST(FLOOR((latitude + 90) / cell) AS INTEGER) AS cell_y,
+            COUNT(*) AS n_sites,
+            SUM(production) AS production,
+            AVG(latitude) AS latitude,
+            AVG(longitude) AS longitude,
+            MODE(country) AS country,
+            MODE(iso3) AS iso3
+        FROM goget_sites
+        CROSS JOIN zooms
+        GROUP BY ALL
+        ORDER BY zoom, cell_y, cell_x
+    """)
+
+    n_sites = conn.execute("SELECT COUNT(*) FROM goget_sites").fetchone()[0]
+    n_clusters = conn.execute("SELECT COUNT(*) FROM goget_clusters").fetchone()[0]
+    print(f"Asset clusters written: {n_sites} sites, {n_clusters} cells over {ZOOM_LEVELS} zoom levels")
+
+
+if __name__ == "__main__":
+    with snapshots.build() as conn:
+        build_asset_clusters(conn)
@@ -0,0 +1,106 @@
+from data_pipeline import snapshots
+
+BALANCE_SOURCES = {
+    "Oil": ("oil_prod", "oil_cons"),
+    "Gas": ("gas_prod", "gas_cons"),
+}
+
+# One set-based pass per build: production and consumption are joined once per
+# fuel, then every derived metric is a window over the combined panel.
+BALANCE_SQL = """
+CREATE OR REPLACE TABLE energy_balance AS
+WITH panel AS (
+    {panel}
+),
+balance AS (
+    -- A fuel without consumption data keeps its production rows, with every
+    -- consumption-derived column NULL rather than computed against zero
+    SELECT
+        Country,
+        iso3,
+        Year,
+        Type,
+        COALESCE(Production, 0) AS Production,
+        CASE WHEN has_cons THEN COALESCE(Consumtion, 0) END AS Consumtion,
+        CASE WHEN has_cons THEN COALESCE(Production, 0) - COALESCE(Consumtion, 0) END AS net_exports,
+        Production / NULLIF(Consumtion, 0) AS self_sufficiency
+    FROM panel
+)
+SELECT
+    *,
+    CASE WHEN net_exports >= 0 THEN 'Net exporter'
+         WHEN net_exports < 0 THEN 'Net importer' END AS trade_status,
+    Production / NULLIF(LAG(Production) OVER w_country, 0) - 1 AS prod_yoy,
+    Consumtion / NULLIF(LAG(Consumtion) OVER w_country, 0) - 1 AS cons_yoy,
+    -- Regional aggregates ("Other South America", ...) carry no iso3; they
+    -- are kept as rows but excluded from world totals and country ranks.
+    CASE WHEN iso3 IS NOT NULL THEN
+        Production / NULLIF(SUM(Production) FILTER (WHERE iso3 IS NOT NULL) OVER w_world, 0)
+    END AS world_share,
+    CASE WHEN iso3 IS NOT NULL THEN RANK() OVER (w_rank ORDER BY Production DESC) END AS prod_rank,
+    CASE WHEN iso3 IS NOT NULL AND Consumtion IS NOT NULL THEN
+        RANK() OVER (w_rank ORDER BY Consumtion DESC) END AS cons_rank,
+    CASE WHEN iso3 IS NOT NULL AND net_exports IS NOT NULL THEN
+        RANK() OVER (w_rank ORDER BY net_exports DESC) END AS net_export_rank
+FROM balance
+WINDOW
+    w_country AS (PARTITION BY Country, Type ORDER BY Year),
+    w_world AS (PARTITION BY Year, Type),
+    w_rank AS (PARTITION BY Year, Type, iso3 IS NULL)
+ORDER BY Type, Year, Country
+"""
+
+PANEL_SQL = """
+    SELECT
+        COALESCE(p.Country, c.Country) AS Country,
+        COALESCE(p.iso3, c.iso3) AS iso3,
+        CAST(COALESCE(p.Year, c.Year) AS INTEGER) AS Year,
+        '{fuel}' AS Type,
+        p.Production,
+        c.Consumtion,
+        {has_cons} AS has_cons
+    FROM (
+        SELECT Country, iso3, Year, SUM(Production) AS Production
+        FROM {prod} GROUP BY Country, iso3, Year
+    ) p
+    FULL OUTER JOIN (
+        SELECT Country, iso3, Year, SUM(Consumtion) AS Consumtion
+        FROM {cons} GROUP BY Country, iso3, Year
+    ) c
+    ON p.Country = c.Country
+        AND p.iso3 IS NOT DISTINCT FROM c.iso3
+        AND p.Year = c.Year
+"""
+
+
+def build_balance(conn):
+    """(Re)write `energy_balance`: one row per country/year/fuel with net
+    exports, self-sufficiency, YoY growth, world share and global ranks."""
+    tables = set(conn.execute(
+        "SELECT table_name FROM information_schema.tables"
+    ).df()["table_name"])
+
+    def has_rows(table):
+        return table in tables and conn.execute(
+            f"SELECT COUNT(*) > 0 FROM {table}"
+        ).fetchone()[0]
+
+    # An empty consumption table (e.g. oil_cons quarantined for wrong
+    # units) keeps the fuel's production rows but no trade figures.
+    panels = [
+        PANEL_SQL.format(fuel=fuel, prod=prod, cons=cons, has_cons=has_rows(cons))
+        for fuel, (prod, cons) in BALANCE_SOURCES.items()
+        if has_rows(prod) and cons in tables
+    ]
+    if not panels:
+        print("No production/consumption tables found, energy_balance not built")
+        return
+
+    conn.execute(BALANCE_SQL.format(panel=" UNION ALL ".join(panels)))
+    n = conn.execute("SELECT COUNT(*) FROM energy_balance").fetchone()[0]
+    print(f"energy_balance written: {n} rows")
+
+
+if __name__ == "__main__":
+    with snapshots.build() as conn:
+        build_balance(conn)
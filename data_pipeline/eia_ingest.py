@@ -1,29 +1,72 @@
+"""EIA spot price and country panel ingestion, as a staged pipeline.
+
+    fetch -> parse:<fuel> (one per sheet, in parallel) -> normalize -> load:price
+    load:oil_prod, load:oil_cons, load:gas_prod, load:gas_cons -> balance
+    load:price + country loads -> forecast
+    load:price -> seasonality
+    asset_clusters
+
+Parse and normalize hand data on through data/processed/, so every stage
+can be re-run alone. Warehouse stages share one snapshot build, which is
+published only when all of them succeed.
+
+Usage:
+    python -m data_pipeline.eia_ingest                   # everything
+    python -m data_pipeline.eia_ingest --only parse:     # just the sheet parsers
+    python -m data_pipeline.eia_ingest --from normalize  # normalize and downstream
+    python -m data_pipeline.eia_ingest --list
+"""
+import re
+from functools import partial
+from pathlib import Path
+
+import duckdb
 import pandas as pd
-import numpy as np
 import requests
-from pathlib import Path
-import os
-import re
+
+from data_pipeline import pipeline, quality
+from data_pipeline.asset_clusters import build_asset_clusters
+from data_pipeline.balance import build_balance
+from data_pipeline.forecast import build_forecasts
+from data_pipeline.seasonality import build_seasonality
 
 BASE_DIR = Path("data")
 RAW_DIR = BASE_DIR / "raw"
 PROCESSED_DIR = BASE_DIR / "processed"
-
-RAW_DIR.mkdir(parents=True, exist_ok=True)
-PROCESSED_DIR.mkdir(parents=True, exist_ok=True)
+CSV_DIR = BASE_DIR / "csv"
 
 EIA_XLS_URL = "https://www.eia.gov/dnav/pet/xls/PET_PRI_SPT_S1_D.xls"
 XLS_PATH = RAW_DIR / "PET_PRI_SPT_S1_D.xls"
 
-if not XLS_PATH.exists():
-    response = requests.get(EIA_XLS_URL)
-    response.raise_for_status()
-    XLS_PATH.write_bytes(response.content)
+SPOT_PRICE_PATH = PROCESSED_DIR / "spot_price.parquet"
 
-print("Excel source ready:", XLS_PATH)
+fuel_sheets = {
+    "Data 1": "Crude Oil",
+    "Data 2": "Gasoline",
+    "Data 3": "RBOB Gasoline",
+    "Data 6": "Jet Fuel",
+    "Data 7": "Propane"
+}
+
+# Country panels: warehouse table -> committed CSV
+country_sources = {
+    "oil_prod": "country_production_oil.csv",
+    "oil_cons": "country_consumtion_oil.csv",
+    "gas_prod": "country_production_gas.csv",
+    "gas_cons": "country_consumtion_gas.csv",
+}
+
+UNITS = {
+    "dollars per barrel": "$/BBL",
+    "dollars per gallon": "$/GAL",
+}
+
+# =============================
+# HELPERS
+# =============================
+def fuel_slug(fuel):
+    return fuel.lower().replace(" ", "_")
 
-xls = pd.ExcelFile(XLS_PATH)
-xls.sheet_names
 
 def shorten_source_name(label: str) -> str:
     s = label.lower()
@@ -51,47 +94,163 @@ def shorten_source_name(label: str) -> str:
 
     return "_".join(s.split()[:3])
 
+
+def parse_label(label):
+    """Split an EIA column label into (product, units)."""
+    m = re.search(r"\(([^)]*)\)\s*$", label)
+    units = UNITS.get(m.group(1).lower(), m.group(1)) if m else None
+    product = re.sub(r"\s*Spot Price.*$", "", label).strip()
+    return product, units
+
+
+def write_parquet(df, path):
+    """Write a frame to Parquet via DuckDB (temp file + rename)."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.tmp")
+    conn = duckdb.connect()
+    try:
+        conn.register("df", df)
+        conn.execute(f"COPY df TO '{tmp}' (FORMAT PARQUET)")
+    finally:
+        conn.close()
+    tmp.replace(path)
+
+# =============================
+# STAGES
+# =============================
+def fetch():
+    RAW_DIR.mkdir(parents=True, exist_ok=True)
+    if not XLS_PATH.exists():
+        response = requests.get(EIA_XLS_URL, timeout=60)
+        response.raise_for_status()
+        XLS_PATH.write_bytes(response.content)
+    print("Excel source ready:", XLS_PATH)
+
+
 def clean_eia_sheet(sheet_name, fuel_type):
+    """One sheet as a long frame: date, price, label, short_name."""
     raw_df = pd.read_excel(XLS_PATH, sheet_name=sheet_name, header=None)
 
     source_labels = raw_df.iloc[2, 1:].astype(str).tolist()
-    print(source_labels)
-    # Data starts at row 2
-    df = raw_df.iloc[2:].copy()
+    # Data starts below the label row
+    df = raw_df.iloc[3:].copy()
     df.columns = ["date"] + source_labels
     df["date"] = pd.to_datetime(df["date"], errors="coerce")
 
-    result = {}
+    long = df.melt(id_vars="date", var_name="label", value_name="price")
+    long["price"] = pd.to_numeric(long["price"], errors="coerce")
+    long = long.dropna(subset=["date", "price"])
+    long["short_name"] = long["label"].map(shorten_source_name)
+    return long
 
-    for label in source_labels:
-        temp = df[["date", label]].copy()
-        temp = temp.rename(columns={label: "price"})
-        temp["price"] = pd.to_numeric(temp["price"], errors="coerce")
 
-        temp = temp.dropna(subset=["date", "price"])
+def parse_sheet(sheet_name, fuel_type):
+    long = clean_eia_sheet(sheet_name, fuel_type)
+    long["fuel"] = fuel_type
+    write_parquet(long, PROCESSED_DIR / f"{fuel_slug(fuel_type)}.parquet")
 
-        short_name = shorten_source_name(label)
-        result[short_name] = temp
 
-    return result
+def normalize():
+    """Per-series CSVs for data/csv and one spot price frame in the
+    warehouse `price` schema."""
+    files = [PROCESSED_DIR / f"{fuel_slug(f)}.parquet" for f in fuel_sheets.values()]
+    long = duckdb.sql(
+        f"SELECT * FROM read_parquet({[str(p) for p in files]}) ORDER BY fuel, label, date"
+    ).df()
 
-fuel_sheets = {
-    "Data 1": "Crude Oil",
-    "Data 2": "Gasoline",
-    "Data 3": "RBOB Gasoline",
-    "Data 6": "Jet Fuel",
-    "Data 7": "Propane"
-}
+    # Two labels shortening to the same name would overwrite one CSV
+    collisions = quality.name_collisions(long)
+    if not collisions.empty:
+        names = ", ".join(f"{fuel_slug(f)}_{n}" for f, n in collisions.index)
+        raise quality.QualityGateError(f"Source labels collide on output name(s): {names}")
 
-CSV_DIR = Path("data/csv")
-CSV_DIR.mkdir(parents=True, exist_ok=True)
+    CSV_DIR.mkdir(parents=True, exist_ok=True)
+    for (fuel, short_name), grp in long.groupby(["fuel", "short_name"], sort=False):
+        output_path = CSV_DIR / f"{fuel_slug(fuel)}_{short_name}.csv"
+        grp[["date", "price"]].to_csv(output_path, index=False)
+        print("Saved:", output_path)
 
-for sheet, fuel in fuel_sheets.items():
-    dfs = clean_eia_sheet(sheet, fuel)
+    labels = long["label"].drop_duplicates()
+    parsed = pd.DataFrame(
+        [parse_label(l) for l in labels], index=labels, columns=["product", "units"]
+    )
+    spot = long.join(parsed, on="label")
+    spot = spot.rename(columns={"fuel": "benchmark"})[
+        ["date", "price", "benchmark", "product", "units"]
+    ]
+    write_parquet(spot, SPOT_PRICE_PATH)
 
-    for short_name, df_clean in dfs.items():
-        filename = f"{fuel.lower().replace(' ', '_')}_{short_name}.csv"
-        output_path = CSV_DIR / filename
 
-        df_clean.to_csv(output_path, index=False)
-        print("Saved:", output_path)
+def load_price(conn):
+    """Replace the EIA spot series in `price`; series from other sources
+    (benchmarks not in the spreadsheet) are left alone."""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS price (
+            date DATE, price DOUBLE, benchmark VARCHAR, product VARCHAR, units VARCHAR
+        )
+    """)
+    conn.execute(f"""
+        CREATE OR REPLACE TEMP VIEW spot AS
+        SELECT CAST(date AS DATE) AS date, price, benchmark, product, units
+        FROM read_parquet('{SPOT_PRICE_PATH}')
+    """)
+    conn.execute("""
+        DELETE FROM price
+        WHERE (benchmark, product) IN (SELECT DISTINCT benchmark, product FROM spot)
+    """)
+    conn.execute("INSERT INTO price SELECT * FROM spot ORDER BY benchmark, product, date")
+    conn.execute("DROP VIEW spot")
+
+
+def load_country(conn, table, filename):
+    """Load one country panel, cleaned before it reaches the warehouse:
+
+    - only the first row per (Country, Year) is kept; the Statistical Review
+      export appends growth-rate and share-of-world rows under the same key
+    - rows in the wrong unit or commodity for the table go to
+      `<table>_quarantine` instead (country_consumtion_oil.csv currently
+      holds the gas series), so no derived table mixes units
+    """
+    _, unit, commodity = quality.PANEL_UNITS[table]
+    df = pd.read_csv(CSV_DIR / filename)
+    df = df.drop_duplicates(subset=["Country", "Year"], keep="first")
+
+    valid = (df["Unit"] == unit) & (df["Commodity"].str.lower() == commodity)
+    conn.register("panel_df", df[valid])
+    conn.register("quarantine_df", df[~valid])
+    conn.execute(f"CREATE OR REPLACE TABLE {table} AS SELECT * FROM panel_df")
+    if (~valid).any():
+        conn.execute(f"CREATE OR REPLACE TABLE {table}_quarantine AS SELECT * FROM quarantine_df")
+        print(f"{table}: {(~valid).sum()} rows quarantined (expected {unit!r} / {commodity!r})")
+    else:
+        conn.execute(f"DROP TABLE IF EXISTS {table}_quarantine")
+    conn.unregister("panel_df")
+    conn.unregister("quarantine_df")
+
+# =============================
+# DAG
+# =============================
+parse_stages = [f"parse:{fuel_slug(f)}" for f in fuel_sheets.values()]
+country_stages = [f"load:{t}" for t in country_sources]
+
+STAGES = [
+    pipeline.Stage("fetch", fetch, [], "local"),
+    *[
+        pipeline.Stage(f"parse:{fuel_slug(fuel)}", partial(parse_sheet, sheet, fuel), ["fetch"], "pool")
+        for sheet, fuel in fuel_sheets.items()
+    ],
+    pipeline.Stage("normalize", normalize, parse_stages, "local"),
+    pipeline.Stage("load:price", load_price, ["normalize"], "warehouse"),
+    *[
+        pipeline.Stage(f"load:{table}", partial(load_country, table=table, filename=filename), [], "warehouse")
+        for table, filename in country_sources.items()
+    ],
+    pipeline.Stage("balance", build_balance, country_stages, "warehouse"),
+    pipeline.Stage("asset_clusters", build_asset_clusters, [], "warehouse"),
+    pipeline.Stage("forecast", build_forecasts, ["load:price", *country_stages], "warehouse"),
+    pipeline.Stage("seasonality", build_seasonality, ["load:price"], "warehouse"),
+]
+
+
+if __name__ == "__main__":
+    pipeline.main(STAGES, description="EIA ingestion pipeline")
@@ -0,0 +1,256 @@
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+import os
+
+from data_pipeline import snapshots
+
+# Monthly prices are forecast one year ahead, yearly country panels five years.
+PRICE_HORIZON = 12
+PRICE_SEASON = 12
+PANEL_HORIZON = 5
+PANEL_SEASON = 1
+
+MIN_POINTS = 8
+Z_95 = 1.96
+ETS_GRID = (0.2, 0.5, 0.8)
+
+PANEL_SOURCES = [
+    ("oil_prod", "Oil", "Production"),
+    ("oil_cons", "Oil", "Consumtion"),
+    ("gas_prod", "Gas", "Production"),
+    ("gas_cons", "Gas", "Consumtion"),
+]
+
+# =============================
+# MODELS
+# =============================
+# Every model takes the history and a horizon and returns (fitted, forecast).
+# `fitted` holds one-step-ahead predictions aligned with y (NaN where the
+# model has no prediction yet), used for the residual spread of intervals.
+
+def seasonal_naive(y, h, m):
+    m = max(1, min(m, len(y) - 1))
+    fitted = np.full(len(y), np.nan)
+    fitted[m:] = y[:-m]
+    season = y[-m:]
+    forecast = np.resize(season, h)
+    return fitted, forecast
+
+
+def linear_trend(y, h, m=None):
+    t = np.arange(len(y))
+    slope, intercept = np.polyfit(t, y, 1)
+    fitted = intercept + slope * t
+    forecast = intercept + slope * np.arange(len(y), len(y) + h)
+    return fitted, forecast
+
+
+def _holt(y, alpha, beta):
+    level, trend = y[0], y[1] - y[0]
+    fitted = np.full(len(y), np.nan)
+    for i in range(1, len(y)):
+        fitted[i] = level + trend
+        new_level = alpha * y[i] + (1 - alpha) * (level + trend)
+        trend = beta * (new_level - level) + (1 - beta) * trend
+        level = new_level
+    return fitted, level, trend
+
+
+def ets(y, h, m=None):
+    """Holt's additive-trend exponential smoothing, smoothing weights picked
+    from a small grid by in-sample squared error."""
+    best = None
+    for alpha in ETS_GRID:
+        for beta in ETS_GRID:
+            fitted, level, trend = _holt(y, alpha, beta)
+            sse = np.nansum((y - fitted) ** 2)
+            if best is None or sse < best[0]:
+                best = (sse, fitted, level, trend)
+    _, fitted, level, trend = best
+    forecast = level + trend * np.arange(1, h + 1)
+    return fitted, forecast
+
+
+MODELS = {
+    "seasonal_naive": seasonal_naive,
+    "linear_trend": linear_trend,
+    "ets": ets,
+}
+
+# =============================
+# FITTING
+# =============================
+def fit_series(task):
+    """Fit every model on one series, keep the one with the lowest holdout MAE.
+
+    `task` is (key, values, horizon, season); returns (key, model, forecast,
+    lower, upper) or None when the series is too short to forecast.
+    """
+    key, y, h, m = task
+    y = np.asarray(y, dtype=float)
+    y = y[~np.isnan(y)]
+    if len(y) < MIN_POINTS:
+        return None
+
+    holdout = max(1, min(h, len(y) // 4))
+    train, test = y[:-holdout], y[-holdout:]
+
+    scores = {}
+    for name, model in MODELS.items():
+        _, pred = model(train, holdout, m)
+        scores[name] = np.mean(np.abs(pred - test))
+    best = min(scores, key=scores.get)
+
+    fitted, forecast = MODELS[best](y, h, m)
+    resid = y - fitted
+    sigma = np.nanstd(resid) if np.isfinite(resid).sum() > 1 else 0.0
+    spread = Z_95 * sigma * np.sqrt(np.arange(1, h + 1))
+
+    return key, best, forecast, forecast - spread, forecast + spread
+
+
+def run_pool(tasks, max_workers=None):
+    """Fit all tasks in a process pool; chunked so each worker gets a few
+    hundred series per round trip instead of one."""
+    if not tasks:
+        return []
+    workers = max_workers or os.cpu_count() or 1
+    chunksize = max(1, len(tasks) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(fit_series, tasks, chunksize=chunksize))
+    return [r for r in results if r is not None]
+
+# =============================
+# PRICE SERIES
+# =============================
+def price_tasks(conn):
+    monthly = conn.execute("""
+        SELECT benchmark, product, units,
+               date_trunc('month', date) AS month,
+               AVG(price) AS price
+        FROM price
+        GROUP BY ALL
+        ORDER BY benchmark, product, month
+    """).df()
+
+    # Task keys are ("price", i) tags into `series`; NULL units stay a group
+    tasks, series = [], []
+    for (benchmark, product, units), grp in monthly.groupby(
+        ["benchmark", "product", "units"], sort=False, dropna=False
+    ):
+        tasks.append((("price", len(series)), grp["price"].to_numpy(), PRICE_HORIZON, PRICE_SEASON))
+        series.append((benchmark, product, units, pd.Timestamp(grp["month"].iloc[-1])))
+    return tasks, series
+
+
+def price_forecast_frame(results, series):
+    rows = []
+    for (_, i), model, fc, lo, hi in results:
+        benchmark, product, units, last_month = series[i]
+        months = pd.date_range(
+            last_month + pd.DateOffset(months=1),
+            periods=len(fc),
+            freq="MS"
+        )
+        rows.append(pd.DataFrame({
+            "benchmark": benchmark,
+            "product": product,
+            "units": units,
+            "date": months,
+            "forecast": fc,
+            "lower": lo,
+            "upper": hi,
+            "model": model,
+        }))
+    if not rows:
+        return pd.DataFrame(columns=[
+            "benchmark", "product", "units", "date", "forecast", "lower", "upper", "model"
+        ])
+    return pd.concat(rows, ignore_index=True)
+
+# =============================
+# COUNTRY PANELS
+# =============================
+def existing_tables(conn):
+    return set(conn.execute(
+        "SELECT table_name FROM information_schema.tables"
+    ).df()["table_name"])
+
+
+def panel_tasks(conn):
+    tables = existing_tables(conn)
+    selects = [
+        f"SELECT Country, iso3, '{fuel}' AS Type, '{metric}' AS Metric, "
+        f"CAST(Year AS INTEGER) AS Year, SUM({metric}) AS value "
+        f"FROM {table} GROUP BY Country, iso3, Year"
+        for table, fuel, metric in PANEL_SOURCES if table in tables
+    ]
+    if not selects:
+        return [], {}
+
+    panel = conn.execute(
+        " UNION ALL ".join(selects) + " ORDER BY Country, Type, Metric, Year"
+    ).df()
+
+    # Task keys are ("panel", i) tags into `series`. Regional aggregates
+    # have no iso3, so NULL keys must not be dropped.
+    tasks, series = [], []
+    for (country, iso3, fuel, metric), grp in panel.groupby(
+        ["Country", "iso3", "Type", "Metric"], sort=False, dropna=False
+    ):
+        tasks.append((("panel", len(series)), grp["value"].to_numpy(), PANEL_HORIZON, PANEL_SEASON))
+        series.append((country, iso3, fuel, metric, int(grp["Year"].iloc[-1])))
+    return tasks, series
+
+
+def panel_forecast_frame(results, series):
+    rows = []
+    for (_, i), model, fc, lo, hi in results:
+        country, iso3, fuel, metric, last_year = series[i]
+        rows.append(pd.DataFrame({
+            "Country": country,
+            "iso3": iso3,
+            "Type": fuel,
+            "Metric": metric,
+            "Year": np.arange(last_year + 1, last_year + 1 + len(fc)),
+            # Volumes cannot go negative, whatever the trend says.
+            "forecast": np.clip(fc, 0, None),
+            "lower": np.clip(lo, 0, None),
+            "upper": np.clip(hi, 0, None),
+            "model": model,
+        }))
+    if not rows:
+        return pd.DataFrame(columns=[
+            "Country", "iso3", "Type", "Metric", "Year", "forecast", "lower", "upper", "model"
+        ])
+    return pd.concat(rows, ignore_index=True)
+
+# =============================
+# STAGE ENTRY POINT
+# =============================
+def build_forecasts(conn, max_workers=None):
+    """Fit every price and country panel series and (re)write the
+    `price_forecast` and `energy_forecast` tables."""
+    p_tasks, p_series = price_tasks(conn)
+    e_tasks, e_series = panel_tasks(conn)
+
+    results = run_pool(p_tasks + e_tasks, max_workers=max_workers)
+
+    price_fc = price_forecast_frame([r for r in results if r[0][0] == "price"], p_series)
+    energy_fc = panel_forecast_frame([r for r in results if r[0][0] == "panel"], e_series)
+
+    conn.register("price_fc_df", price_fc)
+    conn.register("energy_fc_df", energy_fc)
+    conn.execute("CREATE OR REPLACE TABLE price_forecast AS SELECT * FROM price_fc_df")
+    conn.execute("CREATE OR REPLACE TABLE energy_forecast AS SELECT * FROM energy_fc_df")
+    conn.unregister("price_fc_df")
+    conn.unregister("energy_fc_df")
+
+    print(f"Forecasts written: {len(p_tasks)} price series, {len(e_tasks)} country series")
+    return price_fc, energy_fc
+
+
+if __name__ == "__main__":
+    with snapshots.build() as conn:
+        build_forecasts(conn)
@@ -0,0 +1,305 @@
+"""Micro-batch price ingestion.
+
+Tails an append-only drop directory of tick files and, every few seconds,
+writes whatever arrived since the last pass as one batch with the `price`
+schema. Each batch is a Parquet segment under data/live/price/. Segment
+names sort by write time, and data/live/price/LATEST names the newest one,
+so readers can poll a single small file and then read only the segments
+after the last one they saw. Every COMPACT_EVERY passes the segments are
+merged into one file per tick day, which keeps a day from accumulating
+thousands; finished days are then left alone until the fold prunes them.
+
+Published warehouse snapshots are immutable (see snapshots.py), so the
+ticks are not inserted into a snapshot's `price` table in place. Readers
+union the segments newer than their snapshot, and the next warehouse build
+folds them into `price` with fold_live_segments().
+
+Drop files are CSV with a header line:
+
+    date,price,benchmark,product,units
+    2026-01-05T14:30:00,71.32,Brent,UK Brent Crude Oil,$/BBL
+
+Usage:
+    python -m data_pipeline.live_ingest                # tail data/live/drop
+    python -m data_pipeline.live_ingest --simulate     # plus a local stand-in feed
+    python -m data_pipeline.live_ingest --once         # single pass, for cron/tests
+    python -m data_pipeline.live_ingest --fold         # fold finished days into a snapshot
+"""
+import argparse
+import io
+import json
+import os
+import random
+import time
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+
+import duckdb
+import pandas as pd
+
+from data_pipeline import snapshots
+
+LIVE_DIR = Path("data/live")
+DROP_DIR = LIVE_DIR / "drop"
+SEGMENT_DIR = LIVE_DIR / "price"
+STATE_PATH = LIVE_DIR / "offsets.json"
+LATEST_PATH = SEGMENT_DIR / "LATEST"
+
+INTERVAL_SECONDS = 5
+# Compaction runs every COMPACT_EVERY passes (10 minutes at the default
+# interval) once at least COMPACT_MIN_SEGMENTS segments have piled up
+COMPACT_EVERY = 120
+COMPACT_MIN_SEGMENTS = 20
+TICK_COLUMNS = ["date", "price", "benchmark", "product", "units"]
+
+SIMULATED_SERIES = [
+    ("Brent", "UK Brent Crude Oil", "$/BBL", 75.0),
+    ("WTI", "WTI Crude Oil", "$/BBL", 71.0),
+    ("Henry Hub", "Natural Gas", "$/MMBTU", 3.2),
+]
+
+# =============================
+# TAILING
+# =============================
+def _load_offsets():
+    try:
+        return json.loads(STATE_PATH.read_text())
+    except FileNotFoundError:
+        return {}
+
+
+def _save_offsets(offsets):
+    tmp = STATE_PATH.with_suffix(".tmp")
+    tmp.write_text(json.dumps(offsets))
+    os.replace(tmp, STATE_PATH)
+
+
+def read_new_ticks(offsets):
+    """Complete lines appended to every drop file since its stored offset.
+    Returns (ticks, new_offsets); a partially written last line is left for
+    the next pass."""
+    frames, new_offsets = [], dict(offsets)
+
+    for path in sorted(DROP_DIR.glob("*.csv")):
+        start = offsets.get(path.name, 0)
+        if path.stat().st_size <= start:
+            continue
+        with open(path, "rb") as f:
+            f.seek(start)
+            chunk = f.read()
+        end = chunk.rfind(b"\n") + 1
+        if end == 0:
+            continue
+
+        text = chunk[:end].decode()
+        if start == 0:
+            text = text.split("\n", 1)[1]  # header
+        if text.strip():
+            df = pd.read_csv(io.StringIO(text), names=TICK_COLUMNS)
+            frames.append(df)
+        new_offsets[path.name] = start + end
+
+    if not frames:
+        return pd.DataFrame(columns=TICK_COLUMNS), new_offsets
+
+    ticks = pd.concat(frames, ignore_index=True)
+    ticks["date"] = pd.to_datetime(ticks["date"], errors="coerce")
+    ticks["price"] = pd.to_numeric(ticks["price"], errors="coerce")
+    return ticks.dropna(subset=["date", "price"]), new_offsets
+
+
+def _set_latest(name):
+    tmp = LATEST_PATH.with_name(f".{LATEST_PATH.name}.tmp")
+    tmp.write_text(name + "\n")
+    os.replace(tmp, LATEST_PATH)
+
+
+def write_segment(ticks):
+    """Write one micro-batch as a Parquet segment (temp file + rename, so
+    readers globbing the directory never see a partial file), then point
+    LATEST at it."""
+    SEGMENT_DIR.mkdir(parents=True, exist_ok=True)
+    name = f"{datetime.now(timezone.utc):%Y%m%dT%H%M%S%f}-{uuid.uuid4().hex[:6]}.parquet"
+    tmp = SEGMENT_DIR / f".{name}.tmp"
+
+    conn = duckdb.connect()
+    try:
+        conn.register("ticks", ticks)
+        conn.execute(f"""
+            COPY (
+                SELECT CAST(date AS TIMESTAMP) AS date, CAST(price AS DOUBLE) AS price,
+                       benchmark, product, units
+                FROM ticks
+                ORDER BY date
+            ) TO '{tmp}' (FORMAT PARQUET)
+        """)
+    finally:
+        conn.close()
+    os.replace(tmp, SEGMENT_DIR / name)
+    _set_latest(name)
+    return SEGMENT_DIR / name
+
+
+def _compacted_day(path):
+    """Tick day of a compacted segment (`<stem>~cYYYYMMDD.parquet`), or None."""
+    _, sep, day = path.stem.partition("~c")
+    return datetime.strptime(day, "%Y%m%d").date() if sep else None
+
+
+def compact_segments(min_segments=COMPACT_MIN_SEGMENTS):
+    """Merge segments into one file per tick day, each named after the newest
+    member plus `~c<day>` so it sorts after every member: a reader that has
+    seen only part of the group reads the merged file again (its date filter
+    drops the repeats) and one that has seen all of it skips it.
+
+    Merged files of days before today are not merged again, so no file ever
+    spans two days and prune_segments() can drop each finished day once it
+    is folded. Returns the number of segments merged."""
+    today = datetime.now().date()
+    segments = [
+        p for p in segment_files()
+        if _compacted_day(p) is None or _compacted_day(p) >= today
+    ]
+    if len(segments) < min_segments:
+        return 0
+
+    base = segments[-1].stem.split("~")[0]
+    files = ", ".join(f"'{p}'" for p in segments)
+    conn = duckdb.connect()
+    targets = []
+    try:
+        conn.execute(f"""
+            CREATE TEMP TABLE merged AS
+            SELECT * FROM read_parquet([{files}]) ORDER BY date
+        """)
+        days = [d for (d,) in conn.execute(
+            "SELECT DISTINCT CAST(date AS DATE) FROM merged ORDER BY 1"
+        ).fetchall()]
+        for day in days:
+            target = SEGMENT_DIR / f"{base}~c{day:%Y%m%d}.parquet"
+            tmp = SEGMENT_DIR / f".{target.name}.tmp"
+            conn.execute(f"""
+                COPY (SELECT * FROM merged WHERE CAST(date AS DATE) = ?)
+                TO '{tmp}' (FORMAT PARQUET)
+            """, [day])
+            targets.append((tmp, target))
+    except duckdb.IOException:
+        # A concurrent prune removed a member; try again next time
+        for tmp in SEGMENT_DIR.glob(f".{base}~c*.tmp"):
+            tmp.unlink(missing_ok=True)
+        return 0
+    finally:
+        conn.close()
+
+    for tmp, target in targets:
+        os.replace(tmp, target)
+    keep = {target for _, target in targets}
+    for p in segments:
+        if p not in keep:
+            p.unlink(missing_ok=True)
+    return len(segments)
+
+
+def ingest_once():
+    offsets = _load_offsets()
+    ticks, new_offsets = read_new_ticks(offsets)
+    if not ticks.empty:
+        write_segment(ticks)
+    if new_offsets != offsets:
+        _save_offsets(new_offsets)
+    return len(ticks)
+
+# =============================
+# WAREHOUSE FOLD
+# =============================
+def segment_files():
+    return sorted(SEGMENT_DIR.glob("*.parquet")) if SEGMENT_DIR.exists() else []
+
+
+def fold_live_segments(conn):
+    """Insert completed days of segment ticks into `price`, one row per
+    series and day (the day's last tick), for days after each series' last
+    warehouse date. Today's ticks stay in the segments for live readers."""
+    segments = segment_files()
+    if not segments:
+        return 0
+
+    files = ", ".join(f"'{p}'" for p in segments)
+    before = conn.execute("SELECT COUNT(*) FROM price").fetchone()[0]
+    conn.execute(f"""
+        INSERT INTO price (date, price, benchmark, product, units)
+        SELECT CAST(t.date AS DATE), arg_max(t.price, t.date), t.benchmark, t.product,
+               any_value(t.units)
+        FROM read_parquet([{files}]) t
+        LEFT JOIN (
+            SELECT benchmark, product, MAX(date) AS last_date
+            FROM price
+            GROUP BY benchmark, product
+        ) p USING (benchmark, product)
+        WHERE CAST(t.date AS DATE) < current_date
+          AND (p.last_date IS NULL OR CAST(t.date AS DATE) > p.last_date)
+        GROUP BY CAST(t.date AS DATE), t.benchmark, t.product
+    """)
+    return conn.execute("SELECT COUNT(*) FROM price").fetchone()[0] - before
+
+
+def prune_segments():
+    """Remove segments that only hold days already folded into `price`."""
+    today = datetime.now().date()
+    for p in segment_files():
+        newest = duckdb.sql(f"SELECT MAX(date) FROM read_parquet('{p}')").fetchone()[0]
+        if newest is not None and newest.date() < today:
+            p.unlink(missing_ok=True)
+
+# =============================
+# STAND-IN FEED
+# =============================
+def simulate_ticks(path, last_prices):
+    """Append one random-walk tick per simulated series to `path`."""
+    new_file = not path.exists()
+    now = datetime.now().replace(microsecond=0).isoformat()
+    with open(path, "a") as f:
+        if new_file:
+            f.write(",".join(TICK_COLUMNS) + "\n")
+        for benchmark, product, units, _ in SIMULATED_SERIES:
+            last_prices[benchmark] *= 1 + random.gauss(0, 0.002)
+            f.write(f"{now},{last_prices[benchmark]:.4f},{benchmark},{product},{units}\n")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Micro-batch price ingestion")
+    parser.add_argument("--interval", type=float, default=INTERVAL_SECONDS)
+    parser.add_argument("--once", action="store_true", help="run a single ingest pass")
+    parser.add_argument("--simulate", action="store_true", help="also generate stand-in ticks")
+    parser.add_argument("--fold", action="store_true", help="fold completed days into a new snapshot")
+    args = parser.parse_args(argv)
+
+    if args.fold:
+        with snapshots.build() as conn:
+            print(f"Folded {fold_live_segments(conn)} daily prices into price")
+        prune_segments()
+        return
+
+    DROP_DIR.mkdir(parents=True, exist_ok=True)
+    last_prices = {b: p for b, _, _, p in SIMULATED_SERIES}
+
+    passes = 0
+    while True:
+        if args.simulate:
+            simulate_ticks(DROP_DIR / "simulated.csv", last_prices)
+        n = ingest_once()
+        if n:
+            print(f"Ingested {n} ticks")
+        if args.once:
+            break
+        passes += 1
+        if passes % COMPACT_EVERY == 0:
+            merged = compact_segments()
+            if merged:
+                print(f"Compacted {merged} segments")
+        time.sleep(args.interval)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,240 @@
+"""News feed ingestion.
+
+Reads the feeds listed in data/news/feeds.json (RSS 2.0, Atom or JSON Feed;
+http(s) URLs or local files, so the fixtures under data/news/fixtures work
+offline), merges the items into a deduplicated article store and caches a
+pre-resized thumbnail per image.
+
+Thumbnails are named by the hash of the source image bytes and written
+under static/news/thumbs/, which Streamlit serves directly from disk, so
+pages render them by URL without opening or decoding anything per rerun.
+
+Usage:
+    python -m data_pipeline.news_ingest
+"""
+import email.utils
+import hashlib
+import io
+import json
+import os
+import xml.etree.ElementTree as ET
+from datetime import datetime, timezone
+from pathlib import Path
+
+import requests
+
+NEWS_DIR = Path("data/news")
+FEEDS_PATH = NEWS_DIR / "feeds.json"
+STORE_PATH = NEWS_DIR / "articles.json"
+
+THUMB_DIR = Path("static/news/thumbs")
+THUMB_URL_PREFIX = "/app/static/news/thumbs"
+THUMB_SIZE = (300, 300)  # 2x the 150px display width
+
+MAX_ARTICLES = 200
+
+NS = {
+    "atom": "http://www.w3.org/2005/Atom",
+    "media": "http://search.yahoo.com/mrss/",
+}
+
+# =============================
+# FETCH
+# =============================
+def _is_url(ref):
+    return ref.startswith(("http://", "https://"))
+
+
+def fetch_bytes(ref, base_dir=None):
+    """Bytes of a URL or local path (relative paths tried against the
+    working directory first, then `base_dir`)."""
+    if _is_url(ref):
+        response = requests.get(ref, timeout=20)
+        response.raise_for_status()
+        return response.content
+
+    path = Path(ref)
+    if not path.exists() and base_dir is not None:
+        path = Path(base_dir) / ref
+    return path.read_bytes()
+
+# =============================
+# PARSE
+# =============================
+def _text(el, path):
+    found = el.find(path, NS)
+    return found.text.strip() if found is not None and found.text else None
+
+
+def _parse_date(value):
+    if not value:
+        return None
+    try:
+        dt = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        try:
+            dt = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except ValueError:
+            return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.astimezone(timezone.utc).isoformat()
+
+
+def parse_rss(root, feed_name):
+    items = []
+    for item in root.iter("item"):
+        image = None
+        for path, attr in (("media:thumbnail", "url"), ("media:content", "url"), ("enclosure", "url")):
+            el = item.find(path, NS)
+            if el is not None and el.get(attr):
+                image = el.get(attr)
+                break
+        items.append({
+            "title": _text(item, "title"),
+            "link": _text(item, "link"),
+            "summary": _text(item, "description"),
+            "source": _text(item, "source") or feed_name,
+            "published": _parse_date(_text(item, "pubDate")),
+            "image": image,
+        })
+    return items
+
+
+def parse_atom(root, feed_name):
+    items = []
+    for entry in root.findall("atom:entry", NS):
+        link = entry.find("atom:link", NS)
+        thumb = entry.find("media:thumbnail", NS)
+        items.append({
+            "title": _text(entry, "atom:title"),
+            "link": link.get("href") if link is not None else None,
+            "summary": _text(entry, "atom:summary") or _text(entry, "atom:content"),
+            "source": _text(entry, "atom:author/atom:name") or feed_name,
+            "published": _parse_date(_text(entry, "atom:published") or _text(entry, "atom:updated")),
+            "image": thumb.get("url") if thumb is not None else None,
+        })
+    return items
+
+
+def parse_json_feed(data, feed_name):
+    items = []
+    for item in data.get("items", []):
+        authors = item.get("authors") or []
+        items.append({
+            "title": item.get("title"),
+            "link": item.get("url") or item.get("id"),
+            "summary": item.get("summary") or item.get("content_text"),
+            "source": authors[0].get("name") if authors else feed_name,
+            "published": _parse_date(item.get("date_published")),
+            "image": item.get("image") or item.get("banner_image"),
+        })
+    return items
+
+
+def parse_feed(content, feed_name):
+    if content.lstrip()[:1] in (b"{", b"["):
+        return parse_json_feed(json.loads(content), feed_name)
+    root = ET.fromstring(content)
+    if root.tag == f"{{{NS['atom']}}}feed":
+        return parse_atom(root, feed_name)
+    return parse_rss(root, feed_name)
+
+# =============================
+# STORE
+# =============================
+def article_id(item):
+    """Stable dedup key: normalised link, else normalised title."""
+    key = (item.get("link") or "").strip().lower().rstrip("/")
+    if not key:
+        key = " ".join((item.get("title") or "").lower().split())
+    return hashlib.sha1(key.encode()).hexdigest()[:16]
+
+
+def load_store():
+    try:
+        return json.loads(STORE_PATH.read_text())
+    except FileNotFoundError:
+        return []
+
+
+def save_store(articles):
+    STORE_PATH.parent.mkdir(parents=True, exist_ok=True)
+    tmp = STORE_PATH.with_suffix(".tmp")
+    tmp.write_text(json.dumps(articles, indent=1, ensure_ascii=False))
+    os.replace(tmp, STORE_PATH)
+
+# =============================
+# THUMBNAILS
+# =============================
+def make_thumbnail(ref, base_dir=None):
+    """Resize the image once and return its static URL; the file name is the
+    hash of the source bytes, so the same image is never processed twice."""
+    from PIL import Image
+
+    data = fetch_bytes(ref, base_dir)
+    name = hashlib.sha1(data).hexdigest()[:16] + ".jpg"
+    path = THUMB_DIR / name
+
+    if not path.exists():
+        THUMB_DIR.mkdir(parents=True, exist_ok=True)
+        img = Image.open(io.BytesIO(data)).convert("RGB")
+        img.thumbnail(THUMB_SIZE)
+        tmp = path.with_suffix(".tmp")
+        img.save(tmp, format="JPEG", quality=80, optimize=True)
+        os.replace(tmp, path)
+
+    return f"{THUMB_URL_PREFIX}/{name}"
+
+# =============================
+# INGEST
+# =============================
+def ingest(feeds=None, local_only=False):
+    """Fetch every feed, merge new articles into the store, return the
+    number of articles added. `local_only` skips URL feeds and images, so
+    nothing touches the network (the dashboard's first-run bootstrap)."""
+    if feeds is None:
+        feeds = json.loads(FEEDS_PATH.read_text())
+    if local_only:
+        feeds = [f for f in feeds if not _is_url(f["url"])]
+
+    store = {a["id"]: a for a in load_store()}
+    added = 0
+
+    for feed in feeds:
+        base_dir = None if _is_url(feed["url"]) else Path(feed["url"]).parent
+        try:
+            items = parse_feed(fetch_bytes(feed["url"]), feed["name"])
+        except Exception as e:
+            print(f"Skipping feed {feed['name']}: {e}")
+            continue
+
+        for item in items:
+            if not item["title"]:
+                continue
+            aid = article_id(item)
+            if aid in store:
+                continue
+
+            item["id"] = aid
+            item["thumbnail"] = None
+            if item["image"] and not (local_only and _is_url(item["image"])):
+                try:
+                    item["thumbnail"] = make_thumbnail(item["image"], base_dir)
+                except Exception as e:
+                    print(f"No thumbnail for {item['title']!r}: {e}")
+            store[aid] = item
+            added += 1
+
+    articles = sorted(
+        store.values(),
+        key=lambda a: a.get("published") or "",
+        reverse=True
+    )[:MAX_ARTICLES]
+    save_store(articles)
+    print(f"News store: {added} new, {len(articles)} total")
+    return added
+
+
+if __name__ == "__main__":
+    ingest()
@@ -0,0 +1,186 @@
+"""Minimal DAG runner for the data pipeline.
+
+A pipeline is a list of Stage(name, func, deps, kind). Stages hand data to
+each other through files (data/raw, data/processed, data/csv) and the
+warehouse, never through return values, so any subset can be re-run on its
+own with --only / --from.
+
+Stage kinds:
+
+    pool       run in a worker process as soon as its deps are done;
+               independent pool stages run side by side
+    local      run in the main process, func()
+    warehouse  run in the main process against one shared snapshot build,
+               func(conn); the snapshot is published only if every selected
+               stage succeeds, so a failing stage never reaches the app
+
+The runner records how long each stage took and writes the timings of the
+last run to data/processed/stage_timings.json.
+"""
+import argparse
+import json
+import os
+import time
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from contextlib import ExitStack
+from pathlib import Path
+
+from data_pipeline import snapshots
+
+Stage = namedtuple("Stage", ["name", "func", "deps", "kind"])
+
+TIMINGS_PATH = Path("data/processed/stage_timings.json")
+
+# =============================
+# SELECTION
+# =============================
+def validate(stages):
+    names = {s.name for s in stages}
+    for s in stages:
+        missing = set(s.deps) - names
+        if missing:
+            raise ValueError(f"Stage {s.name} depends on unknown stage(s): {sorted(missing)}")
+        if s.kind not in ("pool", "local", "warehouse"):
+            raise ValueError(f"Stage {s.name} has unknown kind {s.kind!r}")
+
+
+def downstream(stages, roots):
+    """`roots` plus every stage that transitively depends on them."""
+    selected = set(roots)
+    changed = True
+    while changed:
+        changed = False
+        for s in stages:
+            if s.name not in selected and selected & set(s.deps):
+                selected.add(s.name)
+                changed = True
+    return selected
+
+
+def _match(stages, patterns):
+    """Stage names matching exact names or `prefix:` groups (e.g. `parse:`)."""
+    names = set()
+    for p in patterns:
+        hits = {s.name for s in stages if s.name == p or (p.endswith(":") and s.name.startswith(p))}
+        if not hits:
+            raise ValueError(f"No stage matches {p!r}")
+        names |= hits
+    return names
+
+
+def select(stages, only=None, start=None):
+    if only:
+        return _match(stages, only)
+    if start:
+        return downstream(stages, _match(stages, start))
+    return {s.name for s in stages}
+
+# =============================
+# EXECUTION
+# =============================
+def _timed(func, *args):
+    t0 = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - t0
+
+
+def run(stages, only=None, start=None, max_workers=None):
+    """Execute the selected stages in dependency order and return
+    {stage: seconds}. Deps outside the selection count as already done."""
+    validate(stages)
+    selected = select(stages, only, start)
+    todo = [s for s in stages if s.name in selected]
+
+    done = {s.name for s in stages} - selected
+    timings, running = {}, {}
+    workers = max_workers or os.cpu_count() or 1
+    t_start = time.perf_counter()
+
+    with ExitStack() as stack:
+        pool = stack.enter_context(ProcessPoolExecutor(max_workers=workers))
+        conn = None
+
+        while todo or running:
+            ready = [s for s in todo if set(s.deps) <= done]
+            for s in ready:
+                if s.kind == "pool":
+                    print(f"[pipeline] start {s.name}")
+                    running[pool.submit(_timed, s.func)] = s
+                    todo.remove(s)
+
+            # One main-process stage at a time, while pool stages keep working
+            local = next((s for s in ready if s.kind != "pool"), None)
+            if local is not None:
+                todo.remove(local)
+                print(f"[pipeline] start {local.name}")
+                if local.kind == "warehouse":
+                    if conn is None:
+                        conn = stack.enter_context(snapshots.build())
+                    timings[local.name] = _timed(local.func, conn)
+                else:
+                    timings[local.name] = _timed(local.func)
+                done.add(local.name)
+                print(f"[pipeline] done  {local.name} ({timings[local.name]:.2f}s)")
+
+            finished = [f for f in running if f.done()]
+            if not finished and local is None:
+                if not running:
+                    blocked = ", ".join(s.name for s in todo)
+                    raise RuntimeError(f"Pipeline cannot make progress: {blocked}")
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+
+            for f in finished:
+                s = running.pop(f)
+                timings[s.name] = f.result()
+                done.add(s.name)
+                print(f"[pipeline] done  {s.name} ({timings[s.name]:.2f}s)")
+
+        # Closing the stack publishes the snapshot (if a warehouse stage ran)
+
+    timings["total"] = time.perf_counter() - t_start
+    write_timings(timings)
+    return timings
+
+
+def write_timings(timings):
+    TIMINGS_PATH.parent.mkdir(parents=True, exist_ok=True)
+    tmp = TIMINGS_PATH.with_suffix(".tmp")
+    tmp.write_text(json.dumps({
+        "finished_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "seconds": {k: round(v, 3) for k, v in timings.items()},
+    }, indent=1))
+    os.replace(tmp, TIMINGS_PATH)
+
+    print("\nStage timings:")
+    for name, seconds in timings.items():
+        print(f"  {name:<28} {seconds:8.2f}s")
+
+# =============================
+# CLI
+# =============================
+def main(stages, argv=None, description="Run the data pipeline"):
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument(
+        "--only", action="append", metavar="STAGE",
+        help="run just this stage (repeatable; `parse:` selects a whole group)"
+    )
+    parser.add_argument(
+        "--from", dest="start", action="append", metavar="STAGE",
+        help="run this stage and everything downstream of it"
+    )
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--list", action="store_true", help="print the stages and exit")
+    args = parser.parse_args(argv)
+
+    if args.list:
+        for s in stages:
+            deps = ", ".join(s.deps) or "-"
+            print(f"{s.name:<28} {s.kind:<10} <- {deps}")
+        return
+
+    try:
+        select(stages, args.only, args.start)
+    except ValueError as e:
+        parser.error(str(e))
+    run(stages, only=args.only, start=args.start, max_workers=args.workers)
@@ -0,0 +1,359 @@
+"""Data-quality gate for warehouse builds.
+
+Every check is one set-based DuckDB query over a whole table; none of them
+loops over series or rows in Python, so the full gate runs in a fraction of
+a second at current scale.
+
+snapshots.build() runs gate() on the staging database right before
+publishing, so every writer (the ingestion DAG, the standalone stage
+scripts, the live-tick fold) goes through it. Findings come in two
+severities:
+
+    error  blocks the publish (the staging snapshot is discarded)
+    warn   reported only
+
+Known, accepted issues are listed in data/quality_waivers.json as
+{check, table, max_rows, reason}. A waiver turns an error into a warning
+only while the finding stays within max_rows, so a known problem that
+grows still blocks.
+
+Usage:
+    python -m data_pipeline.quality      # check the current snapshot
+"""
+import json
+import time
+from pathlib import Path
+
+import duckdb
+import pandas as pd
+
+WAIVERS_PATH = Path("data/quality_waivers.json")
+REPORT_PATH = Path("data/processed/quality_report.json")
+
+# Column -> type family. read_csv_auto may pick INTEGER or BIGINT, DOUBLE or
+# DECIMAL, so types are compared by family rather than by exact name.
+PANEL_SCHEMA = {
+    "Country": "text", "Year": "integer", "Unit": "text",
+    "Commodity": "text", "Source": "text", "iso3": "text",
+}
+EXPECTED_SCHEMA = {
+    "price": {
+        "date": "date", "price": "number", "benchmark": "text",
+        "product": "text", "units": "text",
+    },
+    "oil_prod": {**PANEL_SCHEMA, "Production": "number"},
+    "oil_cons": {**PANEL_SCHEMA, "Consumtion": "number"},
+    "gas_prod": {**PANEL_SCHEMA, "Production": "number"},
+    "gas_cons": {**PANEL_SCHEMA, "Consumtion": "number"},
+}
+
+# Panel table -> (value column, expected Unit, expected Commodity)
+PANEL_UNITS = {
+    "oil_prod": ("Production", "thousand barrels per day", "oil"),
+    "oil_cons": ("Consumtion", "thousand barrels per day", "oil"),
+    "gas_prod": ("Production", "billion cubic metres", "gas"),
+    "gas_cons": ("Consumtion", "billion cubic metres", "gas"),
+}
+
+# Longest plausible run without a daily print (long weekends, holidays)
+MAX_PRICE_GAP_DAYS = 7
+OUTLIER_Z = 8.0
+
+
+class QualityGateError(RuntimeError):
+    pass
+
+# =============================
+# CHECKS
+# =============================
+# Each check returns a list of findings:
+#   {"check", "table", "severity", "rows", "detail"}
+
+def _finding(check, table, severity, rows, detail):
+    return {
+        "check": check, "table": table, "severity": severity,
+        "rows": int(rows), "detail": detail,
+    }
+
+
+def _family(data_type):
+    t = data_type.upper()
+    if t in ("DATE", "TIMESTAMP", "TIMESTAMP WITH TIME ZONE"):
+        return "date"
+    if t in ("TINYINT", "SMALLINT", "INTEGER", "BIGINT", "HUGEINT"):
+        return "integer"
+    if t in ("FLOAT", "DOUBLE", "REAL") or t.startswith("DECIMAL"):
+        return "number"
+    if t == "VARCHAR":
+        return "text"
+    return t.lower()
+
+
+def check_schema(conn):
+    actual = conn.execute("""
+        SELECT table_name, column_name, data_type
+        FROM information_schema.columns
+        WHERE table_schema = 'main'
+    """).df()
+    actual["family"] = actual["data_type"].map(_family)
+
+    expected = pd.DataFrame(
+        [(t, c, f) for t, cols in EXPECTED_SCHEMA.items() for c, f in cols.items()],
+        columns=["table_name", "column_name", "expected"]
+    )
+    merged = expected.merge(actual, on=["table_name", "column_name"], how="left")
+
+    findings = []
+    missing = merged[merged["family"].isna()]
+    for table, grp in missing.groupby("table_name"):
+        findings.append(_finding(
+            "schema", table, "error", len(grp),
+            "missing column(s): " + ", ".join(grp["column_name"])
+        ))
+    # Integers are valid where a number is expected
+    wrong = merged[
+        merged["family"].notna()
+        & (merged["family"] != merged["expected"])
+        & ~((merged["expected"] == "number") & (merged["family"] == "integer"))
+    ]
+    for row in wrong.itertuples():
+        findings.append(_finding(
+            "schema", row.table_name, "error", 1,
+            f"{row.column_name} is {row.data_type}, expected {row.expected}"
+        ))
+    return findings
+
+
+def check_units(conn, tables):
+    findings = []
+    for table, (_, unit, commodity) in PANEL_UNITS.items():
+        if table not in tables:
+            continue
+        bad = conn.execute(f"""
+            SELECT Unit, Commodity, COUNT(*) AS n
+            FROM {table}
+            WHERE Unit IS DISTINCT FROM ? OR lower(Commodity) IS DISTINCT FROM ?
+            GROUP BY ALL
+        """, [unit, commodity]).fetchall()
+        for u, c, n in bad:
+            findings.append(_finding(
+                "units", table, "error", n,
+                f"{n} rows in {u!r} / {c!r}, expected {unit!r} / {commodity!r}"
+            ))
+
+    if "price" in tables:
+        n = conn.execute("""
+            SELECT COUNT(*) FROM (
+                SELECT benchmark, product FROM price
+                GROUP BY ALL HAVING COUNT(DISTINCT units) > 1
+            )
+        """).fetchone()[0]
+        if n:
+            findings.append(_finding(
+                "units", "price", "error", n, f"{n} series quoted in more than one unit"
+            ))
+    return findings
+
+
+def check_duplicates(conn, tables):
+    keys = {"price": "benchmark, product, date"}
+    keys.update({t: "Country, Year" for t in PANEL_UNITS})
+
+    findings = []
+    for table, key in keys.items():
+        if table not in tables:
+            continue
+        n, groups = conn.execute(f"""
+            SELECT COALESCE(SUM(n - 1), 0), COUNT(*) FROM (
+                SELECT COUNT(*) AS n FROM {table} GROUP BY {key} HAVING COUNT(*) > 1
+            )
+        """).fetchone()
+        if n:
+            findings.append(_finding(
+                "duplicates", table, "error", n,
+                f"{n} extra rows over {groups} duplicated ({key}) keys"
+            ))
+    return findings
+
+
+def check_price_series(conn, tables):
+    """Negative prices, calendar gaps and day-over-day outliers, per series,
+    in one pass over `price`."""
+    if "price" not in tables:
+        return []
+
+    negative, gaps, outliers, worst_gap = conn.execute(f"""
+        WITH steps AS (
+            SELECT
+                benchmark, product, price,
+                date_diff('day', LAG(date) OVER w, date) AS gap_days,
+                price - LAG(price) OVER w AS change
+            FROM price
+            WINDOW w AS (PARTITION BY benchmark, product ORDER BY date)
+        ),
+        scored AS (
+            SELECT *,
+                   (change - AVG(change) OVER s) / NULLIF(STDDEV_SAMP(change) OVER s, 0) AS z
+            FROM steps
+            WINDOW s AS (PARTITION BY benchmark, product)
+        )
+        SELECT
+            COUNT(*) FILTER (WHERE price < 0),
+            COUNT(*) FILTER (WHERE gap_days > {MAX_PRICE_GAP_DAYS}),
+            COUNT(*) FILTER (WHERE abs(z) > {OUTLIER_Z}),
+            MAX(gap_days)
+        FROM scored
+    """).fetchone()
+
+    # Negative prints are rare but real (WTI settled below zero in April
+    # 2020), so they are surfaced for review rather than blocking.
+    findings = []
+    if negative:
+        findings.append(_finding("negative_price", "price", "warn", negative,
+                                 f"{negative} negative prices"))
+    if gaps:
+        findings.append(_finding("gaps", "price", "warn", gaps,
+                                 f"{gaps} gaps over {MAX_PRICE_GAP_DAYS} days (longest {worst_gap})"))
+    if outliers:
+        findings.append(_finding("outliers", "price", "warn", outliers,
+                                 f"{outliers} day-over-day moves with |z| > {OUTLIER_Z:g}"))
+    return findings
+
+
+def check_panels(conn, tables):
+    """Missing years inside a country's range and year-over-year outliers."""
+    findings = []
+    for table, (value, _, _) in PANEL_UNITS.items():
+        if table not in tables:
+            continue
+        gaps, outliers = conn.execute(f"""
+            WITH yearly AS (
+                SELECT Country, Year, SUM({value}) AS v
+                FROM {table}
+                GROUP BY Country, Year
+            ),
+            steps AS (
+                SELECT
+                    Country,
+                    Year - LAG(Year) OVER w AS step,
+                    v - LAG(v) OVER w AS change
+                FROM yearly
+                WINDOW w AS (PARTITION BY Country ORDER BY Year)
+            ),
+            scored AS (
+                SELECT *,
+                       (change - AVG(change) OVER c) / NULLIF(STDDEV_SAMP(change) OVER c, 0) AS z
+                FROM steps
+                WINDOW c AS (PARTITION BY Country)
+            )
+            SELECT
+                COALESCE(SUM(step - 1) FILTER (WHERE step > 1), 0),
+                COUNT(*) FILTER (WHERE abs(z) > {OUTLIER_Z})
+            FROM scored
+        """).fetchone()
+        if gaps:
+            findings.append(_finding("gaps", table, "warn", gaps,
+                                     f"{gaps} missing country-years"))
+        if outliers:
+            findings.append(_finding("outliers", table, "warn", outliers,
+                                     f"{outliers} year-over-year moves with |z| > {OUTLIER_Z:g}"))
+    return findings
+
+
+def name_collisions(long):
+    """Output names produced by more than one source label, from a frame with
+    `fuel`, `label` and `short_name` columns (see eia_ingest.normalize)."""
+    counts = long.groupby(["fuel", "short_name"])["label"].nunique()
+    return counts[counts > 1]
+
+# =============================
+# GATE
+# =============================
+def load_waivers():
+    try:
+        return json.loads(WAIVERS_PATH.read_text())
+    except FileNotFoundError:
+        return []
+
+
+def apply_waivers(findings, waivers):
+    for f in findings:
+        for w in waivers:
+            if (
+                f["severity"] == "error"
+                and w["check"] == f["check"]
+                and w["table"] == f["table"]
+                and f["rows"] <= w["max_rows"]
+            ):
+                f["severity"] = "warn"
+                f["waived"] = w["reason"]
+    return findings
+
+
+def check_quarantine(conn, tables):
+    """Rows the loaders set aside (see eia_ingest.load_country)."""
+    findings = []
+    for table in sorted(t for t in tables if t.endswith("_quarantine")):
+        n = conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+        findings.append(_finding(
+            "quarantine", table.removesuffix("_quarantine"), "warn", n,
+            f"{n} rows quarantined in {table}, not served"
+        ))
+    return findings
+
+
+def run_checks(conn):
+    tables = set(conn.execute(
+        "SELECT table_name FROM information_schema.tables WHERE table_schema = 'main'"
+    ).df()["table_name"])
+    return (
+        check_schema(conn)
+        + check_units(conn, tables)
+        + check_duplicates(conn, tables)
+        + check_price_series(conn, tables)
+        + check_panels(conn, tables)
+        + check_quarantine(conn, tables)
+    )
+
+
+def gate(conn, waivers=None):
+    """Run every check, write the report, and raise QualityGateError if any
+    unwaived error remains."""
+    t0 = time.perf_counter()
+    findings = apply_waivers(
+        run_checks(conn), load_waivers() if waivers is None else waivers
+    )
+    seconds = time.perf_counter() - t0
+
+    write_report(findings, seconds)
+    errors = [f for f in findings if f["severity"] == "error"]
+    if errors:
+        raise QualityGateError(
+            f"{len(errors)} data-quality error(s), build not published: "
+            + "; ".join(f"{f['table']}: {f['detail']}" for f in errors)
+        )
+    return findings
+
+
+def write_report(findings, seconds):
+    REPORT_PATH.parent.mkdir(parents=True, exist_ok=True)
+    REPORT_PATH.write_text(json.dumps({
+        "checked_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "seconds": round(seconds, 3),
+        "findings": findings,
+    }, indent=1))
+
+    print(f"Data-quality checks: {len(findings)} finding(s) in {seconds * 1000:.0f} ms")
+    for f in findings:
+        note = f" (waived: {f['waived']})" if "waived" in f else ""
+        print(f"  [{f['severity']}] {f['check']:<14} {f['table']:<10} {f['detail']}{note}")
+
+
+if __name__ == "__main__":
+    from data_pipeline import snapshots
+
+    conn = duckdb.connect(database=str(snapshots.current_path()), read_only=True)
+    try:
+        gate(conn)
+    finally:
+        conn.close()
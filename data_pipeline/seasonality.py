@@ -0,0 +1,121 @@
+from data_pipeline import snapshots
+
+# Classical multiplicative decomposition of every price series at monthly
+# grain, in one set-based pass: monthly mean -> centred 2x12 moving-average
+# trend -> price/trend ratio -> per-month seasonal index (normalised to
+# average 1 per series) -> remainder. The detail page reads the results.
+BASE_SQL = """
+CREATE OR REPLACE TEMP TABLE seasonal_base AS
+WITH monthly AS (
+    SELECT
+        benchmark,
+        product,
+        any_value(units) AS units,
+        CAST(date_trunc('month', date) AS DATE) AS month,
+        AVG(price) AS price
+    FROM price
+    GROUP BY benchmark, product, date_trunc('month', date)
+),
+trended AS (
+    SELECT
+        *,
+        -- 2x12 MA: 13 calendar months, half weight on the two end months.
+        -- Left NULL near the series ends or around missing months.
+        CASE WHEN COUNT(*) OVER w13 = 13 THEN
+            (SUM(price) OVER w13
+             - 0.5 * (FIRST_VALUE(price) OVER w13 + LAST_VALUE(price) OVER w13)) / 12
+        END AS trend
+    FROM monthly
+    WINDOW w13 AS (
+        PARTITION BY benchmark, product ORDER BY month
+        RANGE BETWEEN INTERVAL 6 MONTH PRECEDING AND INTERVAL 6 MONTH FOLLOWING
+    )
+)
+SELECT
+    *,
+    year(month) AS year,
+    month(month) AS month_of_year,
+    -- Ratios are meaningless around a non-positive trend (WTI, April 2020)
+    CASE WHEN trend > 0 THEN price / trend END AS ratio
+FROM trended
+"""
+
+PROFILE_SQL = """
+CREATE OR REPLACE TABLE price_seasonal_profile AS
+WITH raw AS (
+    SELECT
+        benchmark,
+        product,
+        any_value(units) AS units,
+        month_of_year,
+        AVG(ratio) AS idx,
+        quantile_cont(ratio, 0.25) AS q25,
+        quantile_cont(ratio, 0.75) AS q75,
+        COUNT(ratio) AS n_years
+    FROM seasonal_base
+    GROUP BY benchmark, product, month_of_year
+),
+norm AS (
+    SELECT *, AVG(idx) OVER (PARTITION BY benchmark, product) AS scale
+    FROM raw
+)
+SELECT
+    benchmark,
+    product,
+    units,
+    month_of_year,
+    idx / scale AS seasonal_index,
+    q25 / scale AS index_p25,
+    q75 / scale AS index_p75,
+    n_years
+FROM norm
+ORDER BY benchmark, product, month_of_year
+"""
+
+MONTHLY_SQL = """
+CREATE OR REPLACE TABLE price_seasonal_monthly AS
+WITH decomposed AS (
+    SELECT
+        b.benchmark,
+        b.product,
+        b.units,
+        b.month,
+        b.year,
+        b.month_of_year,
+        b.price,
+        b.trend,
+        b.ratio,
+        p.seasonal_index AS seasonal,
+        b.ratio / NULLIF(p.seasonal_index, 0) AS remainder
+    FROM seasonal_base b
+    JOIN price_seasonal_profile p USING (benchmark, product, month_of_year)
+)
+SELECT
+    *,
+    -- Share of detrended variance explained by the seasonal index, 0..1
+    GREATEST(0, 1 - VAR_SAMP(remainder) OVER s / NULLIF(VAR_SAMP(ratio) OVER s, 0))
+        AS seasonal_strength
+FROM decomposed
+WINDOW s AS (PARTITION BY benchmark, product)
+ORDER BY benchmark, product, month
+"""
+
+
+def build_seasonality(conn):
+    """(Re)write `price_seasonal_profile` (one row per series and calendar
+    month) and `price_seasonal_monthly` (one row per series and month:
+    trend, seasonal and remainder components)."""
+    conn.execute(BASE_SQL)
+    conn.execute(PROFILE_SQL)
+    conn.execute(MONTHLY_SQL)
+    conn.execute("DROP TABLE seasonal_base")
+
+    n = conn.execute(
+        "SELECT COUNT(DISTINCT (benchmark, product)) FROM price_seasonal_profile"
+    ).fetchone()[0]
+    print(f"Seasonal decomposition written: {n} price series")
+
+
+if __name__ == "__main__":
+    with snapshots.build() as conn:
+        build_seasonality(conn)
@@ -0,0 +1,240 @@
+"""Versioned, immutable warehouse snapshots.
+
+Layout under data/db/:
+
+    snapshots/<version>/energy.duckdb   one directory per published build
+    current                             name of the live version (one line)
+    energy.duckdb                       committed single file, used until a
+                                        snapshot is published locally; the
+                                        scheduled pipeline refreshes it from
+                                        the newest snapshot (export_legacy)
+
+A build copies the live database into a staging directory, runs its stages
+there, then renames the directory into place and swaps `current` with an
+atomic os.replace. Readers never see a half-written file and never need a
+write lock, so any number of read-only app processes can share the same
+snapshot files through the OS page cache.
+"""
+import fcntl
+import hashlib
+import os
+import shutil
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+
+import duckdb
+
+from data_pipeline import quality
+
+DB_DIR = Path("data/db")
+SNAPSHOT_DIR = DB_DIR / "snapshots"
+POINTER = DB_DIR / "current"
+LEGACY_DB = DB_DIR / "energy.duckdb"
+LOCK_PATH = DB_DIR / ".build.lock"
+DB_NAME = "energy.duckdb"
+
+# Garbage collection keeps the newest KEEP snapshots, plus anything
+# superseded less than GRACE_SECONDS ago so pinned sessions can finish.
+KEEP = 3
+GRACE_SECONDS = 6 * 3600
+
+STAGING_SUFFIX = ".staging"
+
+
+def current_version():
+    try:
+        version = POINTER.read_text().strip()
+    except FileNotFoundError:
+        return None
+    return version or None
+
+
+def snapshot_path(version):
+    return SNAPSHOT_DIR / version / DB_NAME
+
+
+def current_path():
+    """Path of the live database: the current snapshot, or the legacy file."""
+    version = current_version()
+    if version is not None and snapshot_path(version).exists():
+        return snapshot_path(version)
+    return LEGACY_DB
+
+
+def legacy_version():
+    """Label of the legacy file's current contents. export_legacy() replaces
+    it in place, so the label comes from its mtime and size rather than
+    being a constant."""
+    try:
+        info = LEGACY_DB.stat()
+    except FileNotFoundError:
+        return "legacy"
+    return f"legacy-{info.st_mtime_ns}-{info.st_size}"
+
+
+def list_versions():
+    """Published versions, oldest first (names sort chronologically)."""
+    if not SNAPSHOT_DIR.exists():
+        return []
+    return sorted(
+        p.name for p in SNAPSHOT_DIR.iterdir()
+        if p.is_dir() and not p.name.endswith(STAGING_SUFFIX)
+    )
+
+
+def new_version():
+    return datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%fZ")
+
+
+def publish(version):
+    """Point `current` at `version` with an atomic rename."""
+    tmp = POINTER.with_name(f".{POINTER.name}.{os.getpid()}.tmp")
+    tmp.write_text(version + "\n")
+    os.replace(tmp, POINTER)
+
+
+@contextmanager
+def _writer_lock():
+    """Exclusive lock held for a whole build, so two writers (the nightly
+    DAG and a live-tick fold) never both start from the same snapshot and
+    discard each other's rows on publish. Blocks until the other finishes."""
+    DB_DIR.mkdir(parents=True, exist_ok=True)
+    with open(LOCK_PATH, "w") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+@contextmanager
+def build(keep=KEEP, check=True):
+    """Open a writable copy of the live warehouse as a new snapshot.
+
+        with snapshots.build() as conn:
+            build_forecasts(conn)
+
+    On success the snapshot passes the data-quality gate (quality.gate),
+    is published and old ones are collected; on error or a failed gate the
+    staging directory is removed and `current` is untouched. Builds are
+    serialised by a lock file.
+    """
+    with _writer_lock():
+        yield from _build(keep, check)
+
+
+def _build(keep, check):
+    version = new_version()
+    staging = SNAPSHOT_DIR / (version + STAGING_SUFFIX)
+    staging.mkdir(parents=True)
+
+    base = current_version()
+    source = current_path()
+    if source.exists():
+        shutil.copy2(source, staging / DB_NAME)
+
+    try:
+        conn = duckdb.connect(database=str(staging / DB_NAME))
+        try:
+            yield conn
+            if check:
+                quality.gate(conn)
+            conn.execute("CHECKPOINT")
+        finally:
+            conn.close()
+        if current_version() != base:
+            # Only possible if something published without taking the lock
+            raise RuntimeError(
+                f"Warehouse moved from {base} to {current_version()} during the "
+                "build; not publishing over it"
+            )
+        os.rename(staging, SNAPSHOT_DIR / version)
+        # mtime marks publish time; gc uses it as the predecessor's retirement
+        os.utime(SNAPSHOT_DIR / version)
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+    publish(version)
+    print("Published warehouse snapshot:", version)
+    gc(keep=keep)
+
+
+def gc(keep=KEEP, grace_seconds=GRACE_SECONDS):
+    """Delete old snapshots and abandoned staging directories."""
+    live = current_version()
+    versions = list_versions()
+    now = time.time()
+
+    for older, newer in zip(versions, versions[1:]):
+        if older == live or older in versions[-keep:]:
+            continue
+        # A version was superseded when its successor was published
+        superseded_at = (SNAPSHOT_DIR / newer).stat().st_mtime
+        if now - superseded_at < grace_seconds:
+            continue
+        shutil.rmtree(SNAPSHOT_DIR / older, ignore_errors=True)
+        print("Removed warehouse snapshot:", older)
+
+    if SNAPSHOT_DIR.exists():
+        for p in SNAPSHOT_DIR.glob("*" + STAGING_SUFFIX):
+            if now - p.stat().st_mtime > grace_seconds:
+                shutil.rmtree(p, ignore_errors=True)
+
+
+def content_digest(path):
+    """Hash of every table's schema and rows, independent of row order and
+    of the file's physical layout, so two builds of the same data match."""
+    conn = duckdb.connect(database=str(path), read_only=True)
+    try:
+        digest = hashlib.sha1()
+        columns = conn.execute("""
+            SELECT table_name, column_name, data_type
+            FROM information_schema.columns
+            WHERE table_schema = 'main'
+            ORDER BY table_name, ordinal_position
+        """).fetchall()
+        digest.update(repr(columns).encode())
+        for table in sorted({t for t, _, _ in columns}):
+            row = conn.execute(
+                f'SELECT COUNT(*), SUM(hash(t)::HUGEINT) FROM "{table}" t'
+            ).fetchone()
+            digest.update(repr((table, *row)).encode())
+        return digest.hexdigest()
+    finally:
+        conn.close()
+
+
+def export_legacy():
+    """Copy the current snapshot over the committed single-file warehouse.
+
+    Snapshot directories are local to the machine that built them; a
+    deployment that only gets the repository reads LEGACY_DB, so the
+    scheduled pipeline publishes its build there as well. LEGACY_DB is an
+    LFS object, so it is only replaced when the table contents changed;
+    otherwise every nightly run would commit a new copy of the same data.
+    """
+    version = current_version()
+    if version is None or not snapshot_path(version).exists():
+        print("No snapshot published, legacy warehouse left as is")
+        return
+    if LEGACY_DB.exists() and content_digest(LEGACY_DB) == content_digest(snapshot_path(version)):
+        print(f"Snapshot {version} has the same contents as {LEGACY_DB}, not exported")
+        return
+    tmp = LEGACY_DB.with_name(f".{LEGACY_DB.name}.{os.getpid()}.tmp")
+    shutil.copy2(snapshot_path(version), tmp)
+    os.replace(tmp, LEGACY_DB)
+    print(f"Exported snapshot {version} to {LEGACY_DB}")
+
+
+if __name__ == "__main__":
+    import sys
+
+    if "--export-legacy" in sys.argv[1:]:
+        export_legacy()
+    else:
+        print("current:", current_version() or f"(legacy {LEGACY_DB})")
+        for v in list_versions():
+            print(" ", v)
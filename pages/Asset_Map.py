@@ -0,0 +1,237 @@
+import streamlit as st
+import pandas as pd
+import plotly.express as px
+import duckdb
+
+from dashboard import perf, warehouse
+from data_pipeline.asset_clusters import BASE_CELL_DEG
+
+# =============================
+# CONFIG
+# =============================
+st.set_page_config(
+    page_title="Oil & Gas Assets – Field Map",
+    layout="wide"
+)
+
+st.markdown(
+    """
+    <style>
+        .block-container {
+            padding-top: 1rem;
+            padding-bottom: 0rem;
+            padding-left: 1rem;
+            padding-right: 1rem;
+        }
+    </style>
+    """,
+    unsafe_allow_html=True
+)
+perf.start_rerun("Asset_Map")
+
+st.title("Oil & Gas Assets – Field Map")
+st.caption("Field-Level Extraction Sites (GOGET), clustered server-side")
+
+DB_PATH = warehouse.db_path()
+
+# Above this many points in view the site layer falls back to clusters
+MAX_SITES = 5000
+
+# =============================
+# LOAD DATA
+# =============================
+# Sites and per-zoom grid clusters are precomputed by
+# data_pipeline/asset_clusters.py; the page only runs bounding-box lookups.
+@perf.cache_data(max_entries=warehouse.CACHE_ENTRIES)
+def load_country_bounds(db_path):
+    conn = duckdb.connect(database=str(db_path), read_only=True)
+    return perf.query(conn, """
+        SELECT country AS Country, iso3,
+               MIN(latitude) AS lat_min, MAX(latitude) AS lat_max,
+               MIN(longitude) AS lon_min, MAX(longitude) AS lon_max,
+               COUNT(*) AS n_sites
+        FROM goget_sites
+        GROUP BY country, iso3
+        ORDER BY country
+    """)
+
+
+@perf.cache_data(max_entries=warehouse.CACHE_ENTRIES)
+def load_zoom_levels(db_path):
+    conn = duckdb.connect(database=str(db_path), read_only=True)
+    return perf.query(
+        conn, "SELECT DISTINCT zoom FROM goget_clusters ORDER BY zoom"
+    )["zoom"].tolist()
+
+
+def cell_range(zoom, bounds):
+    """Grid cells (x_min, x_max, y_min, y_max) covering a bounding box at
+    one zoom level, in the cell_x / cell_y numbering of goget_clusters."""
+    lat_min, lat_max, lon_min, lon_max = bounds
+    cell = BASE_CELL_DEG / 2 ** zoom
+    return (
+        int((lon_min + 180) // cell), int((lon_max + 180) // cell),
+        int((lat_min + 90) // cell), int((lat_max + 90) // cell),
+    )
+
+
+@perf.cache_data(max_entries=warehouse.FILTERED_CACHE_ENTRIES)
+def load_clusters(zoom, commodities, bounds, db_path):
+    # Filtering on the sort key lets the zone maps skip other cells' row groups
+    x_min, x_max, y_min, y_max = cell_range(zoom, bounds)
+    conn = duckdb.connect(database=str(db_path), read_only=True)
+    return perf.query(conn, f"""
+        SELECT latitude, longitude, n_sites, production, country, commodity
+        FROM goget_clusters
+        WHERE zoom = ?
+          AND commodity IN ({", ".join("?" for _ in commodities)})
+          AND cell_y BETWEEN ? AND ?
+          AND cell_x BETWEEN ? AND ?
+    """, [zoom, *commodities, y_min, y_max, x_min, x_max])
+
+
+@perf.cache_data(max_entries=warehouse.FILTERED_CACHE_ENTRIES)
+def load_cluster_counts(commodities, bounds, db_path):
+    """{zoom: clusters in the bounding box}, every zoom in one query."""
+    zooms = load_zoom_levels(db_path)
+    ranges = [(z, *cell_range(z, bounds)) for z in zooms]
+    conn = duckdb.connect(database=str(db_path), read_only=True)
+    df = perf.query(conn, f"""
+        SELECT c.zoom, COUNT(*) AS n_cells
+        FROM goget_clusters c
+        JOIN (VALUES {", ".join("(?, ?, ?, ?, ?)" for _ in ranges)})
+            r(zoom, x_min, x_max, y_min, y_max) USING (zoom)
+        WHERE c.commodity IN ({", ".join("?" for _ in commodities)})
+          AND c.cell_y BETWEEN r.y_min AND r.y_max
+          AND c.cell_x BETWEEN r.x_min AND r.x_max
+        GROUP BY c.zoom
+    """, [v for r in ranges for v in r] + list(commodities))
+    return dict(zip(df["zoom"], df["n_cells"]))
+
+
+@perf.cache_data(max_entries=warehouse.FILTERED_CACHE_ENTRIES)
+def load_sites(commodities, bounds, db_path, limit=MAX_SITES):
+    lat_min, lat_max, lon_min, lon_max = bounds
+    conn = duckdb.connect(database=str(db_path), read_only=True)
+    return perf.query(conn, f"""
+        SELECT site_name, latitude, longitude, production, production_year,
+               country, commodity
+        FROM goget_sites
+        WHERE commodity IN ({", ".join("?" for _ in commodities)})
+          AND latitude BETWEEN ? AND ?
+          AND longitude BETWEEN ? AND ?
+        LIMIT ?
+    """, [*commodities, lat_min, lat_max, lon_min, lon_max, limit + 1])
+
+
+try:
+    bounds_df = load_country_bounds(DB_PATH)
+except duckdb.Error as e:
+    st.error(f"Asset tables not available, run data_pipeline/asset_clusters.py: {e}")
+    perf.stop()
+zoom_levels = load_zoom_levels(DB_PATH)
+
+# =============================
+# FILTERS
+# =============================
+st.subheader("Map Filters")
+
+c1, c2, c3 = st.columns(3)
+
+with c1:
+    country = st.selectbox(
+        "Focus Country",
+        ["All"] + bounds_df["Country"].dropna().tolist()
+    )
+
+with c2:
+    commodities = st.multiselect(
+        "Commodity",
+        ["Oil", "Gas"],
+        default=["Oil", "Gas"]
+    )
+
+with c3:
+    detail = st.select_slider(
+        "Detail Level",
+        options=zoom_levels + ["Sites"],
+        value=zoom_levels[min(2, len(zoom_levels) - 1)] if country == "All" else "Sites"
+    )
+
+if country != "All":
+    row = bounds_df[bounds_df["Country"] == country].iloc[0]
+    bounds = (row["lat_min"], row["lat_max"], row["lon_min"], row["lon_max"])
+else:
+    bounds = (-90.0, 90.0, -180.0, 180.0)
+
+# =============================
+# MAP
+# =============================
+if not commodities:
+    st.info("Select at least one commodity.")
+    perf.stop()
+
+commodity_key = tuple(sorted(commodities))
+points_df = pd.DataFrame()
+
+if detail == "Sites":
+    points_df = load_sites(commodity_key, bounds, DB_PATH)
+    if len(points_df) > MAX_SITES:
+        # Finest grid first, coarser until the view fits under the cap
+        counts = load_cluster_counts(commodity_key, bounds, DB_PATH)
+        detail = next(
+            (z for z in reversed(zoom_levels) if counts.get(z, 0) <= MAX_SITES),
+            zoom_levels[0]
+        )
+        st.info(
+            f"More than {MAX_SITES:,} sites in view – showing zoom {detail} clusters instead. "
+            "Focus on a country to see individual sites."
+        )
+        points_df = pd.DataFrame()
+
+if detail == "Sites":
+    st.subheader(f"{len(points_df):,} Sites")
+    fig = px.scatter_geo(
+        points_df,
+        lat="latitude",
+        lon="longitude",
+        color="commodity",
+        hover_name="site_name",
+        hover_data={"country": True, "production": ":.2f", "production_year": True},
+        projection="robinson",
+        height=760
+    )
+    fig.update_traces(marker=dict(size=5, opacity=0.7))
+else:
+    points_df = load_clusters(detail, commodity_key, bounds, DB_PATH)
+    st.subheader(
+        f"{len(points_df):,} Clusters covering {int(points_df['n_sites'].sum()):,} Sites"
+    )
+    fig = px.scatter_geo(
+        points_df,
+        lat="latitude",
+        lon="longitude",
+        color="commodity",
+        size="n_sites",
+        size_max=30,
+        hover_name="country",
+        hover_data={"n_sites": True, "production": ":.2f"},
+        projection="robinson",
+        height=760
+    )
+
+if country != "All":
+    fig.update_geos(fitbounds="locations", visible=True)
+
+fig.update_layout(margin=dict(l=0, r=0, t=0, b=0))
+perf.plotly_chart(fig, use_container_width=True)
+
+# =============================
+# BACK
+# =============================
+if st.button("⬅ Back to Dashboard"):
+    st.switch_page("app.py")
+
+st.caption("Oil & Gas Assets – Field Map")
+
+perf.finish_rerun()
@@ -2,7 +2,8 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 import duckdb
-from pathlib import Path
+
+from dashboard import export, news, perf, warehouse
 
 # =============================
 # CONFIG
@@ -11,17 +12,18 @@ st.set_page_config(
     page_title="Energy Consumption & Production – Detail View",
     layout="wide"
 )
+perf.start_rerun("Consumption_Production")
 
 st.title("Energy Consumption & Production – Detail View")
 st.caption("Country-Level Oil & Gas Data (DuckDB-based)")
 
-DB_PATH = Path("data/db/energy.duckdb")
+DB_PATH = warehouse.db_path()
 
 # =============================
 # LOAD DATA
 # =============================
-@st.cache_data
-def load_energy_data(db_path=DB_PATH):
+@perf.cache_data(max_entries=warehouse.CACHE_ENTRIES)
+def load_energy_data(db_path):
     if not db_path.exists():
         st.error(f"DuckDB file not found: {db_path}")
         return pd.DataFrame(), pd.DataFrame()
@@ -30,7 +32,7 @@ def load_energy_data(db_path=DB_PATH):
 
     # Check existing tables
     try:
-        tables_df = conn.execute("SHOW TABLES").df()
+        tables_df = perf.query(conn, "SHOW TABLES")
         table_col = [c for c in tables_df.columns if c.lower() in ("name","table_name")][0]
         tables = tables_df[table_col].tolist()
     except Exception as e:
@@ -42,11 +44,11 @@ def load_energy_data(db_path=DB_PATH):
     # --------------------------
     cons_dfs = []
     if "oil_cons" in tables:
-        df = conn.execute("SELECT Country, Year, Consumtion, iso3 FROM oil_cons").df()
+        df = perf.query(conn, "SELECT Country, Year, Consumtion, iso3 FROM oil_cons")
         df["Type"] = "Oil"
         cons_dfs.append(df)
     if "gas_cons" in tables:
-        df = conn.execute("SELECT Country, Year, Consumtion, iso3 FROM gas_cons").df()
+        df = perf.query(conn, "SELECT Country, Year, Consumtion, iso3 FROM gas_cons")
         df["Type"] = "Gas"
         cons_dfs.append(df)
 
@@ -59,22 +61,22 @@ def load_energy_data(db_path=DB_PATH):
     # --------------------------
     prod_dfs = []
     if "oil_prod" in tables:
-        df = conn.execute("SELECT Country, Year, Production, iso3 FROM oil_prod").df()
+        df = perf.query(conn, "SELECT Country, Year, Production, iso3 FROM oil_prod")
         df["Type"] = "Oil"
         prod_dfs.append(df)
     if "gas_prod" in tables:
-        df = conn.execute("SELECT Country, Year, Production, iso3 FROM gas_prod").df()
+        df = perf.query(conn, "SELECT Country, Year, Production, iso3 FROM gas_prod")
         df["Type"] = "Gas"
         prod_dfs.append(df)
     elif "goget" in tables:
-        df = conn.execute("""
+        df = perf.query(conn, """
             SELECT country AS Country,
                    production_year AS Year,
                    production AS Production,
                    iso3
             FROM goget
             WHERE commodity='Gas'
-        """).df()
+        """)
         df["Type"] = "Gas"
         prod_dfs.append(df)
 
@@ -89,10 +91,66 @@ def load_energy_data(db_path=DB_PATH):
 
     return cons, prod
 
+@perf.cache_data(max_entries=warehouse.CACHE_ENTRIES)
+def load_energy_forecast(db_path):
+    if not db_path.exists():
+        return pd.DataFrame(columns=["Country","Type","Metric","Year","forecast","lower","upper"])
+    conn = duckdb.connect(database=str(db_path), read_only=True)
+    try:
+        return perf.query(conn, """
+            SELECT Country, Type, Metric, Year, forecast, lower, upper
+            FROM energy_forecast
+            ORDER BY Year
+        """)
+    except Exception:
+        # Forecast stage has not been run against this warehouse yet
+        return pd.DataFrame(columns=["Country","Type","Metric","Year","forecast","lower","upper"])
+
+COMPARE_METRICS = {
+    "Consumption": "Consumtion",
+    "Production": "Production",
+    "Net Exports": "net_exports",
+    "Self-Sufficiency": "self_sufficiency",
+}
+
+@perf.cache_data(max_entries=warehouse.FILTERED_CACHE_ENTRIES)
+def load_comparison(countries, energy_type, metric, db_path):
+    """Year x country matrix for one metric, built by a single query.
+
+    `countries` must be a sorted tuple so that any ordering of the same
+    selection hits the same cache entry.
+    """
+    if not countries or not db_path.exists():
+        return pd.DataFrame(columns=["Year"])
+
+    column = COMPARE_METRICS[metric]
+    pivot_cols = ",\n".join(
+        f'SUM({column}) FILTER (WHERE Country = ?) AS "{c.replace(chr(34), chr(34) * 2)}"'
+        for c in countries
+    )
+    placeholders = ", ".join("?" for _ in countries)
+    query = f"""
+        SELECT Year,
+               {pivot_cols}
+        FROM energy_balance
+        WHERE Type = ? AND Country IN ({placeholders})
+        GROUP BY Year
+        ORDER BY Year
+    """
+    params = [*countries, energy_type, *countries]
+
+    conn = duckdb.connect(database=str(db_path), read_only=True)
+    try:
+        return perf.query(conn, query, params)
+    except Exception as e:
+        st.warning(f"Failed to load comparison data: {e}")
+        return pd.DataFrame(columns=["Year"])
+
 # =============================
 # LOAD DATA
 # =============================
-cons_df, prod_df = load_energy_data()
+cons_df, prod_df = load_energy_data(DB_PATH)
+forecast_df = load_energy_forecast(DB_PATH)
 
 # =============================
 # SELECTORS
@@ -101,41 +159,55 @@ st.subheader("Energy Data Explorer")
 
 col1, col2, col3 = st.columns(3)
 
+# Types and countries come from both sides: a fuel whose consumption table
+# is empty (oil_cons quarantined for wrong units) still has production
 with col1:
     selected_type = st.selectbox(
         "Energy Type",
-        sorted(cons_df["Type"].unique()) if not cons_df.empty else []
+        sorted(set(cons_df.get("Type", [])) | set(prod_df.get("Type", [])))
     )
 
 with col2:
     selected_country = st.selectbox(
         "Country",
-        sorted(cons_df["Country"].dropna().unique()) if not cons_df.empty else []
+        sorted(
+            set(cons_df.get("Country", pd.Series(dtype=object)).dropna())
+            | set(prod_df.get("Country", pd.Series(dtype=object)).dropna())
+        )
     )
 
 with col3:
     view_mode = st.selectbox("View Mode", ["Yearly Trend", "Latest Snapshot"])
 
+has_consumption = selected_type in set(cons_df.get("Type", []))
+metrics = ["Consumtion", "Production"] if has_consumption else ["Production"]
+if selected_type and not has_consumption:
+    st.caption(
+        f"No {selected_type.lower()} consumption data in consistent units in this "
+        "warehouse; consumption and trade figures are hidden."
+    )
+
 # =============================
 # FILTER DATA
 # =============================
-if not cons_df.empty and not prod_df.empty:
-    cons_filtered = cons_df[
-        (cons_df["Type"] == selected_type) &
-        (cons_df["Country"] == selected_country)
-    ]
-
-    prod_filtered = prod_df[
-        (prod_df["Type"] == selected_type) &
-        (prod_df["Country"] == selected_country)
-    ]
-
-    merged_df = pd.merge(
-        cons_filtered[["Year", "Consumtion"]],
-        prod_filtered[["Year", "Production"]],
-        on="Year",
-        how="outer"
-    ).sort_values("Year")
+if not (cons_df.empty and prod_df.empty):
+    with perf.span("filter + merge country"):
+        cons_filtered = cons_df[
+            (cons_df["Type"] == selected_type) &
+            (cons_df["Country"] == selected_country)
+        ]
+
+        prod_filtered = prod_df[
+            (prod_df["Type"] == selected_type) &
+            (prod_df["Country"] == selected_country)
+        ]
+
+        merged_df = pd.merge(
+            cons_filtered[["Year", "Consumtion"]],
+            prod_filtered[["Year", "Production"]],
+            on="Year",
+            how="outer"
+        ).sort_values("Year")
 else:
     merged_df = pd.DataFrame(columns=["Year","Consumtion","Production"])
 
@@ -148,13 +220,37 @@ if view_mode == "Yearly Trend":
         fig = px.line(
             merged_df,
             x="Year",
-            y=["Consumtion", "Production"],
+            y=metrics,
             labels={"value": "Volume", "variable": "Metric"},
             height=420
         )
         fig.update_traces(opacity=0.45)
+
+        fc = forecast_df[
+            (forecast_df["Type"] == selected_type) &
+            (forecast_df["Country"] == selected_country) &
+            forecast_df["Metric"].isin(metrics)
+        ]
+        for metric, grp in fc.groupby("Metric"):
+            fig.add_scatter(
+                x=pd.concat([grp["Year"], grp["Year"][::-1]]),
+                y=pd.concat([grp["upper"], grp["lower"][::-1]]),
+                fill="toself",
+                fillcolor="rgba(128,128,128,0.15)",
+                line=dict(width=0),
+                hoverinfo="skip",
+                showlegend=False
+            )
+            fig.add_scatter(
+                x=grp["Year"],
+                y=grp["forecast"],
+                mode="lines",
+                line=dict(dash="dash"),
+                name=f"{metric} forecast"
+            )
+
         fig.update_layout(hovermode="x unified")
-        st.plotly_chart(fig, use_container_width=True)
+        perf.plotly_chart(fig, use_container_width=True)
     else:
         st.info("No data available to display.")
 
@@ -163,14 +259,14 @@ if view_mode == "Yearly Trend":
 # =============================
 else:
     st.subheader(f"{selected_country} – Latest {selected_type} Snapshot")
-    if not merged_df.dropna().empty:
-        latest_row = merged_df.dropna().iloc[-1]
+    complete = merged_df.dropna(subset=metrics)
+    if not complete.empty:
+        latest_row = complete.iloc[-1]
         snapshot = pd.DataFrame({
-            "Metric": ["Year", "Consumtion", "Production", "Energy Type", "Country"],
+            "Metric": ["Year", *metrics, "Energy Type", "Country"],
             "Value": [
                 int(latest_row["Year"]),
-                round(latest_row["Consumtion"], 2),
-                round(latest_row["Production"], 2),
+                *(round(latest_row[m], 2) for m in metrics),
                 selected_type,
                 selected_country
             ]
@@ -180,29 +276,116 @@ else:
         st.info("No data available for the selected country/type.")
 
 # =============================
-# NEWS SECTION
+# MULTI-COUNTRY COMPARISON
 # =============================
-st.subheader("Global Migas News & Analysis")
-news = [
-    {"title": "OPEC+ Considers Production Cut", "source": "Reuters",
-     "summary": "OPEC+ members are discussing potential production cuts amid weakening global demand.",
-     "image": "images/download.jpeg"},
-    {"title": "Middle East Tensions Push Oil Prices Higher", "source": "Bloomberg",
-     "summary": "Escalating geopolitical risks in the Middle East have increased volatility in oil markets.",
-     "image": "images/download (1).jpeg"},
-    {"title": "Global Energy Transition Impacts Oil Demand", "source": "IEA",
-     "summary": "The shift towards renewable energy continues to reshape long-term oil demand outlook.",
-     "image": "images/download (2).jpeg"}
+st.subheader("Multi-Country Comparison")
+
+all_countries = sorted(
+    set(cons_df.get("Country", pd.Series(dtype=object)).dropna())
+    | set(prod_df.get("Country", pd.Series(dtype=object)).dropna())
+)
+default_countries = [
+    c for c in ["United States", "China", "Saudi Arabia", "Russian Federation", "India"]
+    if c in all_countries
 ]
 
-for article in news:
-    col_img, col_text = st.columns([1, 4])
-    with col_img: st.image(article["image"], width=150)
-    with col_text:
-        st.markdown(f"**{article['title']}**")
-        st.caption(article["source"])
-        st.write(article["summary"])
-    st.markdown("---")
+cc1, cc2, cc3 = st.columns([3, 1, 1])
+
+with cc1:
+    compare_countries = st.multiselect(
+        "Countries",
+        all_countries,
+        default=default_countries
+    )
+
+with cc2:
+    compare_metric = st.selectbox(
+        "Metric",
+        list(COMPARE_METRICS) if has_consumption else ["Production"]
+    )
+
+with cc3:
+    compare_layout = st.selectbox("Chart", ["Overlaid", "Small Multiples"])
+
+compare_df = load_comparison(
+    tuple(sorted(compare_countries)),
+    selected_type,
+    compare_metric,
+    DB_PATH
+)
+
+if len(compare_df.columns) > 1 and not compare_df.empty:
+    with perf.span("melt comparison"):
+        long_df = compare_df.melt(
+            id_vars="Year",
+            var_name="Country",
+            value_name=compare_metric
+        )
+    if compare_layout == "Overlaid":
+        fig = px.line(
+            long_df,
+            x="Year",
+            y=compare_metric,
+            color="Country",
+            height=460
+        )
+        fig.update_layout(hovermode="x unified")
+    else:
+        fig = px.line(
+            long_df,
+            x="Year",
+            y=compare_metric,
+            facet_col="Country",
+            facet_col_wrap=4,
+            facet_row_spacing=0.06,
+            height=220 * ((len(compare_df.columns) - 2) // 4 + 1)
+        )
+        fig.for_each_annotation(lambda a: a.update(text=a.text.split("=")[-1]))
+        fig.update_yaxes(matches=None, showticklabels=True)
+    perf.plotly_chart(fig, use_container_width=True)
+else:
+    st.info("Select one or more countries to compare.")
+
+# =============================
+# EXPORT
+# =============================
+st.subheader("Export Data")
+
+export_countries = sorted(
+    ({selected_country} if selected_country else set()) | set(compare_countries)
+)
+years = pd.concat([
+    cons_df.get("Year", pd.Series(dtype=float)),
+    prod_df.get("Year", pd.Series(dtype=float)),
+]).dropna()
+
+if export_countries and not years.empty:
+    year_range = st.slider(
+        "Years",
+        int(years.min()),
+        int(years.max()),
+        (int(years.min()), int(years.max()))
+    )
+    st.caption(f"{selected_type} · {', '.join(export_countries)}")
+    export.render_export(
+        "energy",
+        f"""
+            SELECT Country, iso3, Year, Type, Production, Consumtion,
+                   net_exports, self_sufficiency, prod_yoy, cons_yoy, world_share
+            FROM energy_balance
+            WHERE Type = ?
+              AND Country IN ({", ".join("?" for _ in export_countries)})
+              AND Year BETWEEN ? AND ?
+            ORDER BY Country, Year
+        """,
+        (selected_type, *export_countries, *year_range),
+        key="energy_export"
+    )
+
+# =============================
+# NEWS SECTION
+# =============================
+news.render_news()
 
 # =============================
 # BACK BUTTON
@@ -211,3 +394,5 @@ if st.button("⬅ Back to Dashboard"):
     st.switch_page("app.py")
 
 st.caption("Energy Consumption & Production – Detail View (DuckDB-based)")
+
+perf.finish_rerun()
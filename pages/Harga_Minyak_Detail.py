@@ -3,6 +3,8 @@ import pandas as pd
 import plotly.express as px
 import duckdb
 
+from dashboard import export, news, perf, warehouse
+
 # =============================
 # CONFIG
 # =============================
@@ -10,28 +12,72 @@ st.set_page_config(
     page_title="Global Energy Price – Detail View",
     layout="wide"
 )
+perf.start_rerun("Harga_Minyak_Detail")
 
 st.title("Global Energy Price – Detail View")
 st.caption("Based on International Energy Price Time Series (DuckDB)")
 
+DB_PATH = warehouse.db_path()
+
 # =============================
 # LOAD DATA
 # =============================
-@st.cache_data
-def load_price_timeseries(db_path="data/db/energy.duckdb"):
+@perf.cache_data(max_entries=warehouse.CACHE_ENTRIES)
+def load_price_timeseries(db_path):
     # Open connection INSIDE the cached function
-    conn = duckdb.connect(database=db_path, read_only=True)
+    conn = duckdb.connect(database=str(db_path), read_only=True)
     
     query = """
         SELECT date AS period, price AS value, benchmark, product AS product_name, units
         FROM price
         ORDER BY date
     """
-    df = conn.execute(query).df()
+    df = perf.query(conn, query)
     df["period"] = pd.to_datetime(df["period"])
     return df
 
-price_df = load_price_timeseries()
+@perf.cache_data(max_entries=warehouse.CACHE_ENTRIES)
+def load_price_forecast(db_path):
+    conn = duckdb.connect(database=str(db_path), read_only=True)
+    try:
+        df = perf.query(conn, """
+            SELECT date AS period, forecast, lower, upper, model,
+                   benchmark, product AS product_name
+            FROM price_forecast
+            ORDER BY date
+        """)
+        df["period"] = pd.to_datetime(df["period"])
+        return df
+    except Exception:
+        # Forecast stage has not been run against this warehouse yet
+        return pd.DataFrame(columns=[
+            "period", "forecast", "lower", "upper", "model", "benchmark", "product_name"
+        ])
+
+@perf.cache_data(max_entries=warehouse.CACHE_ENTRIES)
+def load_seasonality(db_path):
+    """Seasonal profile and monthly decomposition of every series, built by
+    data_pipeline.seasonality; the page only filters them."""
+    conn = duckdb.connect(database=str(db_path), read_only=True)
+    try:
+        profile = perf.query(conn, """
+            SELECT benchmark, product AS product_name, month_of_year,
+                   seasonal_index, index_p25, index_p75, n_years
+            FROM price_seasonal_profile
+        """)
+        monthly = perf.query(conn, """
+            SELECT benchmark, product AS product_name, year, month_of_year,
+                   price, ratio, seasonal_strength
+            FROM price_seasonal_monthly
+        """)
+        return profile, monthly
+    except Exception:
+        # Seasonality stage has not been run against this warehouse yet
+        return pd.DataFrame(), pd.DataFrame()
+
+price_df = load_price_timeseries(DB_PATH)
+forecast_df = load_price_forecast(DB_PATH)
+profile_df, seasonal_df = load_seasonality(DB_PATH)
 
 # =============================
 # SELECTORS
@@ -62,10 +108,11 @@ with col2:
 # =============================
 # FILTER DATA
 # =============================
-filtered_df = price_df[
-    (price_df["benchmark"] == selected_benchmark) &
-    (price_df["product_name"] == selected_product)
-]
+with perf.span("filter benchmark/product"):
+    filtered_df = price_df[
+        (price_df["benchmark"] == selected_benchmark) &
+        (price_df["product_name"] == selected_product)
+    ]
 
 # =============================
 # PRICE CHART
@@ -83,7 +130,29 @@ if not filtered_df.empty:
         },
         height=420
     )
-    st.plotly_chart(fig, use_container_width=True)
+
+    fc = forecast_df[
+        (forecast_df["benchmark"] == selected_benchmark) &
+        (forecast_df["product_name"] == selected_product)
+    ]
+    if not fc.empty:
+        fig.add_scatter(
+            x=pd.concat([fc["period"], fc["period"][::-1]]),
+            y=pd.concat([fc["upper"], fc["lower"][::-1]]),
+            fill="toself",
+            fillcolor="rgba(99,110,250,0.15)",
+            line=dict(width=0),
+            hoverinfo="skip",
+            name="95% interval"
+        )
+        fig.add_scatter(
+            x=fc["period"],
+            y=fc["forecast"],
+            mode="lines",
+            line=dict(dash="dash"),
+            name=f"Forecast ({fc['model'].iloc[0]})"
+        )
+    perf.plotly_chart(fig, use_container_width=True)
 else:
     st.info("No data available for the selected benchmark/product.")
 
@@ -107,32 +176,107 @@ if not filtered_df.empty:
     })
     st.dataframe(snapshot, use_container_width=True, hide_index=True)
 
+# =============================
+# SEASONALITY
+# =============================
+st.subheader("Seasonality")
+
+MONTHS = ["Jan", "Feb", "Mar", "Apr", "May", "Jun",
+          "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
+
+if profile_df.empty:
+    st.info("Seasonal decomposition not available. Run `python -m data_pipeline.seasonality`.")
+else:
+    with perf.span("filter seasonality"):
+        prof = profile_df[
+            (profile_df["benchmark"] == selected_benchmark) &
+            (profile_df["product_name"] == selected_product)
+        ].sort_values("month_of_year")
+        monthly = seasonal_df[
+            (seasonal_df["benchmark"] == selected_benchmark) &
+            (seasonal_df["product_name"] == selected_product)
+        ]
+
+    if prof.empty or monthly.empty:
+        st.info("No seasonal decomposition for the selected product.")
+    else:
+        st.caption(
+            f"Seasonal strength {monthly['seasonal_strength'].iloc[0]:.2f} "
+            "(share of detrended variance explained by the calendar month, 0–1)"
+        )
+        col_profile, col_heatmap = st.columns(2)
+
+        with col_profile:
+            effect = (prof["seasonal_index"] - 1) * 100
+            fig_profile = px.bar(
+                x=[MONTHS[m - 1] for m in prof["month_of_year"]],
+                y=effect,
+                error_y=(prof["index_p75"] - prof["seasonal_index"]) * 100,
+                error_y_minus=(prof["seasonal_index"] - prof["index_p25"]) * 100,
+                labels={"x": "Month", "y": "Seasonal effect vs trend (%)"},
+                title="Seasonal profile (bars: mean, whiskers: interquartile range)",
+                height=420
+            )
+            perf.plotly_chart(fig_profile, use_container_width=True)
+
+        with col_heatmap:
+            heat_metric = st.radio(
+                "Heatmap value",
+                ["Deviation from trend (%)", "Average price"],
+                horizontal=True
+            )
+            deviation = heat_metric == "Deviation from trend (%)"
+            with perf.span("pivot calendar heatmap"):
+                value = (monthly["ratio"] - 1) * 100 if deviation else monthly["price"]
+                grid = (
+                    monthly.assign(value=value)
+                    .pivot(index="year", columns="month_of_year", values="value")
+                    .reindex(columns=range(1, 13))
+                    .sort_index(ascending=False)
+                )
+            fig_heat = px.imshow(
+                grid.to_numpy(),
+                x=MONTHS,
+                y=grid.index.astype(str),
+                color_continuous_scale="RdBu_r" if deviation else "Viridis",
+                color_continuous_midpoint=0 if deviation else None,
+                labels={"x": "Month", "y": "Year", "color": heat_metric},
+                aspect="auto",
+                height=420
+            )
+            perf.plotly_chart(fig_heat, use_container_width=True)
+
+# =============================
+# EXPORT
+# =============================
+st.subheader("Export Data")
+
+if not filtered_df.empty:
+    min_date = filtered_df["period"].min().date()
+    max_date = filtered_df["period"].max().date()
+    date_range = st.date_input(
+        "Date range",
+        value=(min_date, max_date),
+        min_value=min_date,
+        max_value=max_date
+    )
+    if len(date_range) == 2:
+        export.render_export(
+            "price",
+            """
+                SELECT date, price, benchmark, product, units
+                FROM price
+                WHERE benchmark = ? AND product = ? AND date BETWEEN ? AND ?
+                ORDER BY date
+            """,
+            (selected_benchmark, selected_product, *date_range),
+            key="price_export"
+        )
+
 # =============================
 # NEWS SECTION
 # =============================
-st.subheader("Global Migas News & Analysis")
-
-news = [
-    {"title": "OPEC+ Considers Production Cut", "source": "Reuters",
-     "summary": "OPEC+ members are discussing potential production cuts amid weakening global demand.",
-     "image": "images/download.jpeg"},
-    {"title": "Middle East Tensions Push Oil Prices Higher", "source": "Bloomberg",
-     "summary": "Escalating geopolitical risks in the Middle East have increased volatility in oil markets.",
-     "image": "images/download (1).jpeg"},
-    {"title": "Global Energy Transition Impacts Oil Demand", "source": "IEA",
-     "summary": "The shift towards renewable energy continues to reshape long-term oil demand outlook.",
-     "image": "images/download (2).jpeg"}
-]
-
-for article in news:
-    col_img, col_text = st.columns([1, 4])
-    with col_img:
-        st.image(article["image"], width=150)
-    with col_text:
-        st.markdown(f"**{article['title']}**")
-        st.caption(article["source"])
-        st.write(article["summary"])
-    st.markdown("---")
+news.render_news()
 
 # =============================
 # BACK BUTTON
@@ -141,3 +285,5 @@ if st.button("⬅ Back to Dashboard"):
     st.switch_page("app.py")
 
 st.caption("Energy Price Dashboard – Detail View (DuckDB-based)")
+
+perf.finish_rerun()
@@ -2,7 +2,8 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 import duckdb
-from pathlib import Path
+
+from dashboard import perf, warehouse
 
 # =============================
 # CONFIG
@@ -25,41 +26,91 @@ st.markdown(
     """,
     unsafe_allow_html=True
 )
+perf.start_rerun("Map_Detail")
 
 st.title("Global Oil Production – Map Detail")
 st.caption("Country-Level Oil Production & Consumption")
 
-DB_PATH = Path("data/db/energy.duckdb")
+DB_PATH = warehouse.db_path()
 
 # =============================
 # LOAD DATA (OIL ONLY)
 # =============================
-@st.cache_data
-def load_oil_data(db_path=DB_PATH):
-    conn = duckdb.connect(database=str(db_path), read_only=True)
+# Production/consumption join, ratios and ranks are precomputed by
+# data_pipeline/balance.py into `energy_balance`; this page only filters it.
+# Where oil_cons was quarantined the balance keeps oil production with NULL
+# consumption; warehouses the balance stage has not run against fall back to
+# joining oil_prod/oil_cons here.
+OIL_UNIT = "thousand barrels per day"
+
+
+def derive_oil_metrics(oil):
+    """The `energy_balance` columns, computed from a prod/cons frame."""
+    oil = oil.sort_values(["Country", "Year"])
+    by_year = oil.groupby("Year")
+    oil["net_exports"] = oil["Production"] - oil["Consumtion"]
+    oil["self_sufficiency"] = oil["Production"] / oil["Consumtion"].where(oil["Consumtion"] != 0)
+    oil["trade_status"] = (oil["net_exports"] >= 0).map(
+        {True: "Net exporter", False: "Net importer"}
+    ).where(oil["net_exports"].notna())
+    oil["prod_yoy"] = oil.groupby("Country")["Production"].pct_change()
+    oil["world_share"] = oil["Production"] / by_year["Production"].transform("sum")
+    oil["prod_rank"] = by_year["Production"].rank(method="min", ascending=False)
+    oil["cons_rank"] = by_year["Consumtion"].rank(method="min", ascending=False)
+    oil["net_export_rank"] = by_year["net_exports"].rank(method="min", ascending=False)
+    return oil
+
 
-    oil_prod = conn.execute("""
+def load_legacy_oil_data(conn):
+    oil = perf.query(conn, """
         SELECT Country, iso3, Year, Production
         FROM oil_prod
-    """).df()
-
-    oil_cons = conn.execute("""
-        SELECT Country, iso3, Year, Consumtion
-        FROM oil_cons
-    """).df()
-
-    oil = pd.merge(
-        oil_prod,
-        oil_cons,
-        on=["Country", "iso3", "Year"],
-        how="left"
-    )
+        WHERE iso3 IS NOT NULL
+    """).drop_duplicates(["Country", "Year"])
+
+    try:
+        cons_ok = conn.execute(
+            "SELECT bool_and(Unit = ?) FROM oil_cons", [OIL_UNIT]
+        ).fetchone()[0]
+    except duckdb.Error:
+        cons_ok = False
+
+    if cons_ok:
+        oil_cons = perf.query(conn, """
+            SELECT Country, iso3, Year, Consumtion
+            FROM oil_cons
+        """).drop_duplicates(["Country", "Year"])
+        oil = pd.merge(oil, oil_cons, on=["Country", "iso3", "Year"], how="left")
+        oil["Consumtion"] = oil["Consumtion"].fillna(0)
+    else:
+        oil["Consumtion"] = float("nan")
 
-    oil["Consumtion"] = oil["Consumtion"].fillna(0)
-    return oil
+    return derive_oil_metrics(oil), bool(cons_ok)
 
 
-df = load_oil_data()
+@perf.cache_data(max_entries=warehouse.CACHE_ENTRIES)
+def load_oil_data(db_path):
+    """(frame, has_consumption). has_consumption is False when no oil
+    consumption in oil units is available."""
+    conn = duckdb.connect(database=str(db_path), read_only=True)
+    try:
+        df = perf.query(conn, """
+            SELECT Country, iso3, Year, Production, Consumtion,
+                   net_exports, self_sufficiency, trade_status,
+                   prod_yoy, world_share,
+                   prod_rank, cons_rank, net_export_rank
+            FROM energy_balance
+            WHERE Type = 'Oil' AND iso3 IS NOT NULL
+        """)
+    except duckdb.CatalogException:
+        df = pd.DataFrame()
+
+    if not df.empty:
+        return df, bool(df["Consumtion"].notna().any())
+    return load_legacy_oil_data(conn)
+
+
+df, has_consumption = load_oil_data(DB_PATH)
 
 # =============================
 # DEFAULT YEAR = 2023
@@ -72,7 +123,7 @@ default_year = 2023 if 2023 in available_years else max(available_years)
 # =============================
 st.subheader("Map Filters")
 
-c1, c2 = st.columns(2)
+c1, c2, c3 = st.columns(3)
 
 with c1:
     year = st.selectbox(
@@ -87,38 +138,84 @@ with c2:
         ["All"] + sorted(df["Country"].dropna().unique())
     )
 
-map_df = df[df["Year"] == year]
+with c3:
+    # Trade layers need oil consumption in the same unit as production
+    layers = ["Production"]
+    if has_consumption:
+        layers += ["Net Exporters vs Importers", "Net Exports", "Self-Sufficiency"]
+    layer = st.selectbox("Map Layer", layers)
+
+if not has_consumption:
+    st.caption(
+        "Oil consumption is not available in oil units for this warehouse, "
+        "so consumption and trade figures are hidden."
+    )
 
-if country != "All":
-    map_df = map_df[map_df["Country"] == country]
+with perf.span("filter map year/country"):
+    map_df = df[df["Year"] == year]
+
+    if country != "All":
+        map_df = map_df[map_df["Country"] == country]
 
 # =============================
-# MAP (PRODUCTION ONLY)
+# MAP
 # =============================
-st.subheader(f"Oil Production Map – {year}")
-
-fig = px.choropleth(
-    map_df,
-    locations="iso3",
-    locationmode="ISO-3",
-    color="Production",
-    hover_name="Country",
-    projection="robinson",
-    color_continuous_scale="Blues",
-    height=860
-)
+st.subheader(f"Oil {layer} Map – {year}")
+
+hover_data = {
+    "Production": ":.2f",
+    "Consumtion": ":.2f",
+    "net_exports": ":.2f",
+    "self_sufficiency": ":.2f",
+    "prod_rank": True,
+    "net_export_rank": True,
+}
+
+if layer == "Net Exporters vs Importers":
+    fig = px.choropleth(
+        map_df,
+        locations="iso3",
+        locationmode="ISO-3",
+        color="trade_status",
+        hover_name="Country",
+        hover_data=hover_data,
+        projection="robinson",
+        color_discrete_map={"Net exporter": "#2b8cbe", "Net importer": "#e34a33"},
+        height=860
+    )
+else:
+    color_col, scale = {
+        "Production": ("Production", "Blues"),
+        "Net Exports": ("net_exports", "RdBu"),
+        "Self-Sufficiency": ("self_sufficiency", "Viridis"),
+    }[layer]
+    fig = px.choropleth(
+        map_df,
+        locations="iso3",
+        locationmode="ISO-3",
+        color=color_col,
+        hover_name="Country",
+        hover_data=hover_data,
+        projection="robinson",
+        color_continuous_scale=scale,
+        color_continuous_midpoint=0 if color_col == "net_exports" else None,
+        height=860
+    )
 
 if country != "All":
     fig.update_geos(fitbounds="locations", visible=True)
 
 fig.update_layout(margin=dict(l=0, r=0, t=0, b=0))
-st.plotly_chart(fig, use_container_width=True)
+perf.plotly_chart(fig, use_container_width=True)
 
 # =============================
 # COUNTRY DETAIL
 # =============================
 st.subheader("Country Detail – Production vs Consumption")
 
+def _fmt(value, spec):
+    return "–" if pd.isna(value) else spec.format(value)
+
 if country != "All":
     country_df = df[df["Country"] == country]
 
@@ -133,36 +230,49 @@ if country != "All":
             "ISO3 Code",
             "Year",
             "Oil Production",
-            "Oil Consumption"
+            "Oil Consumption",
+            "Net Exports",
+            "Self-Sufficiency Ratio",
+            "Production YoY Growth",
+            "Share of World Production",
+            "Global Production Rank",
+            "Global Net Export Rank"
         ],
         "Value": [
             detail_row["Country"],
             detail_row["iso3"],
             int(detail_row["Year"]),
             round(detail_row["Production"], 2),
-            round(detail_row["Consumtion"], 2)
+            _fmt(detail_row["Consumtion"], "{:.2f}"),
+            _fmt(detail_row["net_exports"], "{:.2f}"),
+            _fmt(detail_row["self_sufficiency"], "{:.2f}"),
+            _fmt(detail_row["prod_yoy"], "{:+.1%}"),
+            _fmt(detail_row["world_share"], "{:.1%}"),
+            _fmt(detail_row["prod_rank"], "{:.0f}"),
+            _fmt(detail_row["net_export_rank"], "{:.0f}")
         ]
     })
 
     st.dataframe(detail_table, use_container_width=True, hide_index=True)
 
-    pie_df = pd.DataFrame({
-        "Metric": ["Production", "Consumption"],
-        "Value": [
-            detail_row["Production"],
-            detail_row["Consumtion"]
-        ]
-    })
-
-    fig_pie = px.pie(
-        pie_df,
-        names="Metric",
-        values="Value",
-        title=f"{country} – Oil Production vs Consumption ({int(detail_row['Year'])})",
-        height=420
-    )
-
-    st.plotly_chart(fig_pie, use_container_width=True)
+    if has_consumption:
+        pie_df = pd.DataFrame({
+            "Metric": ["Production", "Consumption"],
+            "Value": [
+                detail_row["Production"],
+                detail_row["Consumtion"]
+            ]
+        })
+
+        fig_pie = px.pie(
+            pie_df,
+            names="Metric",
+            values="Value",
+            title=f"{country} – Oil Production vs Consumption ({int(detail_row['Year'])})",
+            height=420
+        )
+
+        perf.plotly_chart(fig_pie, use_container_width=True)
 else:
     st.info("Select a country to view detailed information.")
 
@@ -178,11 +288,9 @@ with col1:
     st.markdown("### 🛢️ Top 10 Producers")
 
     top10_prod = (
-        df[df["Year"] == year]
-        .groupby(["Country", "iso3"], as_index=False)["Production"]
-        .sum()
-        .sort_values("Production", ascending=False)
-        .head(10)
+        df[(df["Year"] == year) & (df["prod_rank"] <= 10)]
+        .sort_values("prod_rank")
+        [["Country", "iso3", "Production", "world_share"]]
     )
 
     st.dataframe(top10_prod, use_container_width=True)
@@ -191,15 +299,16 @@ with col1:
 with col2:
     st.markdown("### 🔥 Top 10 Consumers")
 
-    top10_cons = (
-        df[df["Year"] == year]
-        .groupby(["Country", "iso3"], as_index=False)["Consumtion"]
-        .sum()
-        .sort_values("Consumtion", ascending=False)
-        .head(10)
-    )
+    if has_consumption:
+        top10_cons = (
+            df[(df["Year"] == year) & (df["cons_rank"] <= 10)]
+            .sort_values("cons_rank")
+            [["Country", "iso3", "Consumtion", "self_sufficiency"]]
+        )
 
-    st.dataframe(top10_cons, use_container_width=True)
+        st.dataframe(top10_cons, use_container_width=True)
+    else:
+        st.info("Oil consumption not available.")
 
 # =============================
 # BACK
@@ -208,3 +317,5 @@ if st.button("⬅ Back to Dashboard"):
     st.switch_page("app.py")
 
 st.caption("Global Oil Production – Map Detail")
+
+perf.finish_rerun()
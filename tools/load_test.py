@@ -0,0 +1,187 @@
+"""Concurrent-session load test for the Streamlit dashboard.
+
+Drives N simulated sessions through app.py and every page in pages/ using
+Streamlit's AppTest, all inside this one process, the same way a single
+`streamlit run` process serves its users: script reruns share the global
+`st.cache_data` cache but each session gets its own copies of the results.
+
+Each session reruns its page repeatedly, changing one selectbox/radio
+between reruns like a user clicking around. Reported per page:
+
+    reruns/sec, p50/p95 rerun latency, baseline and peak RSS, and the
+    peak RSS growth divided by the number of concurrent sessions.
+
+Usage:
+    python tools/load_test.py --sessions 20 --reruns 10
+    python tools/load_test.py --pages pages/Map_Detail.py --json report.json
+"""
+import argparse
+import json
+import logging
+import os
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+from streamlit.testing.v1 import AppTest
+
+ROOT = Path(__file__).resolve().parents[1]
+DEFAULT_PAGES = ["app.py"] + sorted(
+    str(p.relative_to(ROOT)) for p in (ROOT / "pages").glob("*.py")
+)
+
+# =============================
+# MEMORY
+# =============================
+def rss_bytes():
+    """Current resident set size of this process (Linux /proc, else maxrss)."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class PeakRSS:
+    """Samples RSS on a background thread and keeps the maximum."""
+
+    def __init__(self, interval=0.05):
+        self.interval = interval
+        self.peak = rss_bytes()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.peak = max(self.peak, rss_bytes())
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, rss_bytes())
+        return False
+
+# =============================
+# SESSIONS
+# =============================
+def _perturb(at, rng):
+    """Change one selectbox or radio to a random option, like a user would."""
+    widgets = list(at.selectbox) + [r for r in at.radio if r.options]
+    widgets = [w for w in widgets if len(w.options) > 1]
+    if not widgets:
+        return
+    widget = rng.choice(widgets)
+    index = rng.randrange(len(widget.options))
+    if hasattr(widget, "select_index"):
+        widget.select_index(index)
+    else:
+        widget.set_value(widget.options[index])
+
+
+def run_session(page, reruns, seed, timeout):
+    """One simulated user: first load plus `reruns` interactions.
+    Returns rerun latencies in seconds and the number of failed reruns."""
+    rng = random.Random(seed)
+    at = AppTest.from_file(str(ROOT / page), default_timeout=timeout)
+    latencies, errors = [], 0
+
+    for i in range(reruns + 1):
+        if i:
+            _perturb(at, rng)
+        t0 = time.perf_counter()
+        try:
+            at.run()
+        except Exception:
+            errors += 1
+            continue
+        latencies.append(time.perf_counter() - t0)
+        if at.exception:
+            errors += 1
+    return latencies, errors
+
+
+def load_page(page, sessions, reruns, timeout, seed=0):
+    baseline = rss_bytes()
+    t0 = time.perf_counter()
+
+    with PeakRSS() as mem, ThreadPoolExecutor(max_workers=sessions) as pool:
+        futures = [
+            pool.submit(run_session, page, reruns, seed + i, timeout)
+            for i in range(sessions)
+        ]
+        results = [f.result() for f in futures]
+
+    elapsed = time.perf_counter() - t0
+    latencies = np.array([l for lat, _ in results for l in lat])
+    errors = sum(e for _, e in results)
+
+    return {
+        "page": page,
+        "sessions": sessions,
+        "reruns": int(len(latencies)),
+        "errors": int(errors),
+        "reruns_per_sec": round(len(latencies) / elapsed, 2) if elapsed else None,
+        "p50_ms": round(float(np.percentile(latencies, 50)) * 1000, 1) if len(latencies) else None,
+        "p95_ms": round(float(np.percentile(latencies, 95)) * 1000, 1) if len(latencies) else None,
+        "baseline_rss_mb": round(baseline / 2**20, 1),
+        "peak_rss_mb": round(mem.peak / 2**20, 1),
+        "rss_per_session_mb": round((mem.peak - baseline) / sessions / 2**20, 2),
+    }
+
+# =============================
+# CLI
+# =============================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--sessions", type=int, default=10, help="concurrent sessions per page")
+    parser.add_argument("--reruns", type=int, default=5, help="interactions per session after first load")
+    parser.add_argument("--pages", nargs="+", default=DEFAULT_PAGES, help="scripts relative to the repo root")
+    parser.add_argument("--timeout", type=float, default=120, help="per-rerun timeout in seconds")
+    parser.add_argument("--cold", action="store_true", help="skip the cache warm-up run")
+    parser.add_argument("--json", help="also write the report to this file")
+    args = parser.parse_args(argv)
+
+    # Pages open data/db/... relative to the working directory
+    os.chdir(ROOT)
+    sys.path.insert(0, str(ROOT))
+
+    # Bare-mode AppTest warns on every thread; keep the report readable
+    for name in list(logging.root.manager.loggerDict):
+        if name.startswith("streamlit"):
+            logging.getLogger(name).setLevel(logging.ERROR)
+
+    report = []
+    for page in args.pages:
+        if not args.cold:
+            run_session(page, 0, seed=0, timeout=args.timeout)
+        row = load_page(page, args.sessions, args.reruns, args.timeout)
+        report.append(row)
+        print(
+            f"{row['page']:<36} {row['sessions']:>3} sessions  "
+            f"{row['reruns_per_sec']:>7} reruns/s  "
+            f"p50 {row['p50_ms']:>7} ms  p95 {row['p95_ms']:>7} ms  "
+            f"peak {row['peak_rss_mb']:>7} MB  "
+            f"{row['rss_per_session_mb']:>6} MB/session  "
+            f"errors {row['errors']}"
+        )
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(report, indent=2))
+    return report
+
+
+if __name__ == "__main__":
+    main()